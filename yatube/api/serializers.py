@@ -0,0 +1,50 @@
+def user_data(user):
+    return {
+        'username': user.username,
+        'full_name': user.get_full_name(),
+    }
+
+
+def group_data(group):
+    return {
+        'slug': group.slug,
+        'title': group.title,
+        'description': group.description,
+    }
+
+
+def post_data(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'author': user_data(post.author),
+        'group': post.group.slug if post.group_id else None,
+        'image': post.image.url if post.image else None,
+    }
+
+
+def comment_data(comment):
+    return {
+        'id': comment.pk,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+        'author': user_data(comment.author),
+    }
+
+
+def stats_data(stats):
+    return {
+        'posts_count': stats.posts_count,
+        'followers_count': stats.followers_count,
+        'following_count': stats.following_count,
+    }
+
+
+def page_data(page, serialize):
+    return {
+        'count': page.paginator.count,
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+        'results': [serialize(item) for item in page],
+    }
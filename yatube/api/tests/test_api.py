@@ -0,0 +1,113 @@
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from core.cache_versions import get_versions
+from posts.caching import SITE, follow_page
+from posts.models import Follow, Group, Post, User
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='auth')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            slug='test-slug',
+            title='Тестовая группа',
+            description='Описание тестовой группы',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.user,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_endpoints(self):
+        """ Тест проверяет ответы API на тех же данных, что и страницы """
+        addresses = {
+            reverse('api:posts'): 'results',
+            reverse('api:post_detail', kwargs={'post_id': self.post.pk}):
+                'text',
+            reverse('api:post_comments', kwargs={'post_id': self.post.pk}):
+                'results',
+            reverse('api:groups'): 'results',
+            reverse('api:group_posts', kwargs={'slug': self.group.slug}):
+                'posts',
+            reverse('api:profile', kwargs={'username': self.user.username}):
+                'stats',
+        }
+        for address, key in addresses.items():
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(key, response.json())
+        data = self.guest_client.get(reverse('api:posts')).json()
+        self.assertEqual(data['results'][0]['text'], self.post.text)
+        self.assertEqual(data['count'], 1)
+
+    def test_conditional_get(self):
+        """
+        Тест проверяет, что при неизменных данных отдается 304,
+        а после записи — новый ответ с другим ETag
+        """
+        address = reverse('api:posts')
+        response = self.guest_client.get(address)
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+        response = self.guest_client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(text='Новый пост', author=self.user)
+        response = self.guest_client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_follow_feed(self):
+        """ Тест проверяет ленту подписок и ее ETag """
+        address = reverse('api:follow')
+        self.assertEqual(self.guest_client.get(address).status_code, 401)
+        etag = self.reader_client.get(address)['ETag']
+        Follow.objects.create(user=self.reader, author=self.user)
+        response = self.reader_client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['results'][0]['text'], self.post.text
+        )
+
+    def test_follow_feed_dependencies(self):
+        """
+        Тест проверяет, что версии ленты подписок не зависят от числа
+        авторов и читаются без запросов к базе
+        """
+        Follow.objects.create(user=self.reader, author=self.user)
+        request = RequestFactory().get(reverse('api:follow'))
+        request.user = self.reader
+        with self.assertNumQueries(0):
+            names = follow_page(request)
+        self.assertEqual(names, [SITE, f'timeline:{self.reader.pk}'])
+
+    def test_follow_feed_after_edit(self):
+        """
+        Тест проверяет, что правка поста сдвигает версию ленты
+        подписчика и меняет ETag ленты подписок
+        """
+        Follow.objects.create(user=self.reader, author=self.user)
+        address = reverse('api:follow')
+        etag = self.reader_client.get(address)['ETag']
+        timeline = f'timeline:{self.reader.pk}'
+        version = get_versions([timeline])[timeline]
+        self.post.text = 'Исправленный текст'
+        self.post.save()
+        self.assertGreater(get_versions([timeline])[timeline], version)
+        response = self.reader_client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['results'][0]['text'], 'Исправленный текст'
+        )
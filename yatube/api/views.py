@@ -0,0 +1,116 @@
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_safe
+
+from core.decorators import conditional_on_versions
+from posts.caching import (
+    follow_page, group_page, groups_page, index_page, post_page,
+    profile_page,
+)
+from posts.counters import feed_count_key
+from posts.models import Group, Post, User
+from posts.paginators import KeysetPaginator
+from posts.stats import get_stats
+from posts.views import comments_page
+
+from .serializers import (
+    comment_data, group_data, page_data, post_data, stats_data, user_data,
+)
+
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse(
+                {'detail': 'Требуется авторизация'}, status=401
+            )
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def posts_page(request, post_list, post_attr=None, **kwargs):
+    """Страница ленты по курсору из ``?cursor=``, как в HTML-версии."""
+    pages = KeysetPaginator(post_list, settings.POSTS_ON_PAGE, **kwargs)
+    page = pages.get_page(1, cursor=request.GET.get('cursor'))
+    if post_attr:
+        page.object_list = [getattr(row, post_attr) for row in page]
+    return page_data(page, post_data)
+
+
+@require_safe
+@conditional_on_versions(index_page)
+def posts(request):
+    post_list = Post.objects.select_related('author', 'group')
+    return JsonResponse(
+        posts_page(request, post_list, count_key=feed_count_key('all'))
+    )
+
+
+@require_safe
+@conditional_on_versions(post_page)
+def post_detail(request, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id
+    )
+    return JsonResponse(post_data(post))
+
+
+@require_safe
+@conditional_on_versions(post_page)
+def post_comments(request, post_id):
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    return JsonResponse(
+        page_data(comments_page(request, post_id), comment_data)
+    )
+
+
+@require_safe
+@conditional_on_versions(groups_page)
+def groups(request):
+    return JsonResponse(
+        {'results': [group_data(group) for group in Group.objects.all()]}
+    )
+
+
+@require_safe
+@conditional_on_versions(group_page)
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    post_list = group.posts.select_related('author', 'group')
+    data = group_data(group)
+    data['posts'] = posts_page(
+        request, post_list, count_key=feed_count_key('group', group.pk)
+    )
+    return JsonResponse(data)
+
+
+@require_safe
+@conditional_on_versions(profile_page)
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    stats = get_stats(author)
+    post_list = author.posts.select_related('author', 'group')
+    data = user_data(author)
+    data['stats'] = stats_data(stats)
+    data['posts'] = posts_page(request, post_list, count=stats.posts_count)
+    return JsonResponse(data)
+
+
+@require_safe
+@api_login_required
+@conditional_on_versions(follow_page)
+def follow(request):
+    entries = request.user.timeline.select_related(
+        'post__author', 'post__group'
+    )
+    return JsonResponse(posts_page(
+        request,
+        entries,
+        post_attr='post',
+        ordering=('-pub_date', '-post_id'),
+        count_key=feed_count_key('follow', request.user.pk),
+    ))
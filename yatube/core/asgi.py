@@ -0,0 +1,55 @@
+"""
+ASGI-вход для Django 2.2, у которого своего ASGI-обработчика нет.
+
+Мост — ``asgiref.wsgi.WsgiToAsgi``; здесь только то, чего в нем нет:
+WSGI-приложение выполняется в ограниченном пуле потоков, а не в одном
+общем потоке, ответ закрывается (Django по ``close()`` шлет
+request_finished и закрывает соединения с базой), у HEAD нет тела.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from django.conf import settings
+
+
+def closing_response(wsgi_application):
+    """WSGI-обертка: закрыть ответ и не отдавать тело на HEAD."""
+    def application(environ, start_response):
+        result = wsgi_application(environ, start_response)
+        try:
+            if environ['REQUEST_METHOD'] != 'HEAD':
+                yield from result
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+    return application
+
+
+class AsgiInstance(WsgiToAsgiInstance):
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        # В asgiref метод обернут sync_to_async с thread_sensitive:
+        # все запросы шли бы по очереди в одном потоке. Та же функция
+        # без обертки выполняется в пуле.
+        run = sync_to_async(
+            WsgiToAsgiInstance.__dict__['run_wsgi_app'].func,
+            thread_sensitive=False, executor=self.executor,
+        )
+        await run(self, body)
+
+
+class AsgiHandler(WsgiToAsgi):
+    def __init__(self, wsgi_application, max_workers=None):
+        super().__init__(closing_response(wsgi_application))
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.ASGI_THREADS,
+            thread_name_prefix='asgi',
+        )
+
+    async def __call__(self, scope, receive, send):
+        instance = AsgiInstance(self.wsgi_application, self.executor)
+        await instance(scope, receive, send)
@@ -0,0 +1,14 @@
+from django.test.utils import override_settings
+
+# Замеры пишут в кеш версии и страницы из временной базы: им нельзя
+# попадать в общий кеш воркеров.
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'core.cache_backends.InstrumentedLocMemCache',
+        'LOCATION': 'benchmark',
+    }
+}
+
+
+def isolated_cache():
+    return override_settings(CACHES=BENCHMARK_CACHES)
@@ -0,0 +1,93 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import Client
+
+from core.asgi import AsgiHandler
+
+
+class SlowCache(LocMemCache):
+    """Кеш в памяти с задержкой сети, как у внешнего сервера кеша."""
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self.latency = params.get('OPTIONS', {}).get('LATENCY', 0.005)
+
+    def get(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().get(*args, **kwargs)
+
+    def get_many(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().get_many(*args, **kwargs)
+
+
+def summary(timings, elapsed):
+    timings = sorted(timings)
+    return {
+        'requests_per_second': round(len(timings) / elapsed),
+        'p50_ms': round(statistics.median(timings) * 1000, 2),
+        'p95_ms': round(timings[int(len(timings) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def run_wsgi(paths, threads):
+    """Гостевые запросы через обычный WSGI-обработчик в пуле потоков."""
+    def request(path):
+        started = time.perf_counter()
+        response = Client().get(path)
+        assert response.status_code == 200, path
+        connection.close()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        timings = list(executor.map(request, paths))
+    return summary(timings, time.perf_counter() - started)
+
+
+async def asgi_request(application, path):
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        sent.append(message)
+
+    started = time.perf_counter()
+    await application({
+        'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'',
+        'http_version': '1.1',
+        'headers': [], 'server': ('testserver', 80),
+    }, receive, send)
+    assert sent[0]['status'] == 200, path
+    return time.perf_counter() - started
+
+
+def run_asgi(paths, threads, clients):
+    """
+    Те же запросы через core.asgi с тем же числом потоков;
+    одновременно ждут ответа не больше ``clients`` клиентов.
+    """
+    application = AsgiHandler(get_wsgi_application(), max_workers=threads)
+
+    async def run_all():
+        slots = asyncio.Semaphore(clients)
+
+        async def limited(path):
+            async with slots:
+                return await asgi_request(application, path)
+
+        return await asyncio.gather(*(limited(path) for path in paths))
+
+    started = time.perf_counter()
+    timings = asyncio.run(run_all())
+    elapsed = time.perf_counter() - started
+    application.executor.shutdown()
+    return summary(timings, elapsed)
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from django.db import OperationalError, connection, connections, transaction
+from django.test.utils import override_settings
+
+from posts.models import Comment, Post
+
+# Настройки SQLite по умолчанию: журнал отката, соединение на запрос.
+DEFAULT_MODE = {
+    'pragmas': {'journal_mode': 'delete', 'synchronous': 'full'},
+    'persistent': False,
+}
+
+
+def read_feed():
+    posts = Post.objects.select_related('author', 'group')
+    list(posts[:10])
+
+
+def write_comment(post_id, author_id):
+    with transaction.atomic():
+        Comment.objects.create(
+            text='Нагрузка', post_id=post_id, author_id=author_id
+        )
+
+
+def worker(operation, args, deadline, persistent, totals, lock):
+    done = errors = 0
+    while time.perf_counter() < deadline:
+        try:
+            operation(*args)
+            done += 1
+        except OperationalError:
+            # «database is locked» — именно то, что должна убрать настройка.
+            errors += 1
+        if not persistent:
+            connection.close()
+    connection.close()
+    with lock:
+        totals['done'] += done
+        totals['errors'] += errors
+
+
+def run_mode(pragmas, persistent, readers, writers, duration, post_id,
+             author_id):
+    """
+    Прогнать читателей ленты и писателей комментариев одновременно.
+    Возвращает операции в секунду и число ошибок блокировки.
+    """
+    results = {}
+    with override_settings(SQLITE_PRAGMAS=pragmas):
+        # Режим журнала меняется только без других соединений.
+        connections.close_all()
+        read_feed()
+        connection.close()
+        reads = {'done': 0, 'errors': 0}
+        writes = {'done': 0, 'errors': 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+        threads = [
+            threading.Thread(target=worker, args=(
+                read_feed, (), deadline, persistent, reads, lock))
+            for _ in range(readers)
+        ] + [
+            threading.Thread(target=worker, args=(
+                write_comment, (post_id, author_id), deadline, persistent,
+                writes, lock))
+            for _ in range(writers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        connections.close_all()
+    for name, totals in (('reads', reads), ('writes', writes)):
+        results[f'{name}_per_second'] = round(totals['done'] / duration, 1)
+        results[f'{name}_errors'] = totals['errors']
+    return results
@@ -0,0 +1,107 @@
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import urls as posts_urls
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    index = min(int(round(share * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def view_cases(data):
+    """
+    Запросы ко всем страницам ``posts.urls`` на популярных данных.
+    Значение: (метод, kwargs для reverse, авторизован ли, данные POST).
+    """
+    author = data['author'].username
+    post_id = data['post'].pk
+    return {
+        'index': ('get', {}, False, None),
+        'group_list': ('get', {'slug': data['group'].slug}, False, None),
+        'search': ('get', {}, False, {'q': 'дом'}),
+        'profile': ('get', {'username': author}, False, None),
+        'profile_export': (
+            'get', {'username': data['reader'].username}, True, None
+        ),
+        'post_detail': ('get', {'post_id': post_id}, False, None),
+        'post_comments': ('get', {'post_id': post_id}, False, None),
+        'post_create': ('get', {}, True, None),
+        'post_edit': ('get', {'post_id': post_id}, True, None),
+        'add_comment': (
+            'post', {'post_id': post_id}, True, {'text': 'Бенчмарк'}
+        ),
+        'follow_index': ('get', {}, True, None),
+        'profile_follow': ('get', {'username': author}, True, None),
+        'profile_unfollow': ('get', {'username': author}, True, None),
+    }
+
+
+def missing_cases(cases):
+    names = {
+        pattern.name for pattern in posts_urls.urlpatterns if pattern.name
+    }
+    return sorted(names - set(cases))
+
+
+def measure(cases, reader, iterations, cold=True):
+    """
+    Прогнать каждый запрос ``iterations`` раз после прогрева.
+    Возвращает задержки в миллисекундах (p50, p95, p99) и число запросов
+    к базе на самый тяжелый прогон. По умолчанию (``cold``) кеш
+    очищается перед каждым запросом, и замеряется сама отрисовка;
+    без ``cold`` — отдача из кеша.
+    """
+    guest = Client()
+    user = Client()
+    user.force_login(reader)
+    results = {}
+    for name, (method, kwargs, authorized, payload) in cases.items():
+        client = user if authorized else guest
+        address = reverse(f'posts:{name}', kwargs=kwargs)
+        request = getattr(client, method)
+        request(address, payload)
+        timings = []
+        queries = 0
+        for _ in range(iterations):
+            if cold:
+                cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = request(address, payload)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = max(queries, len(captured))
+        results[name] = {
+            'p50': round(percentile(timings, 0.5), 3),
+            'p95': round(percentile(timings, 0.95), 3),
+            'p99': round(percentile(timings, 0.99), 3),
+            'queries': queries,
+        }
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Список регрессий относительно сохраненного прогона."""
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f'{name}: запросов {previous["queries"]} -> '
+                f'{current["queries"]}'
+            )
+        if current['p95'] > previous['p95'] * (1 + tolerance):
+            regressions.append(
+                f'{name}: p95 {previous["p95"]} -> {current["p95"]} мс'
+            )
+    return regressions
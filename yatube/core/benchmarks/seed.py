@@ -0,0 +1,131 @@
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+
+from core.cache_versions import bump_versions
+from core.utils import chunked, insert_as_is
+from posts.caching import SITE
+from posts.counters import feed_count_key, reset_counts
+from posts.models import Comment, Follow, Group, Post, User
+from posts.search import rebuild_index
+from posts.stats import recount_all_stats
+from posts.timeline import rebuild_timeline
+
+BATCH_SIZE = 1000
+# Показатель закона Ципфа: немногие авторы, группы и посты собирают
+# большую часть публикаций, подписчиков и комментариев.
+SKEW = 1.1
+DEFAULT_VOLUMES = {
+    'users': 200,
+    'groups': 20,
+    'posts': 5000,
+    'comments': 10000,
+    'follows': 2000,
+}
+
+
+def zipf_weights(size):
+    return [1 / (rank + 1) ** SKEW for rank in range(size)]
+
+
+def bulk_insert(model, objects):
+    # Вставка как есть: даты auto_now_add берутся из объектов.
+    for chunk in chunked(objects, BATCH_SIZE):
+        insert_as_is(model, chunk, ignore_conflicts=model is Follow)
+
+
+def refresh_derived_data(user_ids, group_ids):
+    """
+    Вставка идет в обход сигналов, поэтому после заполнения базы
+    счетчики, ленты подписок, поисковый индекс и версии страниц
+    пересобираются целиком.
+    """
+    recount_all_stats()
+    with transaction.atomic():
+        rebuild_timeline()
+    with transaction.atomic():
+        rebuild_index()
+    reset_counts(
+        [feed_count_key('all')]
+        + [feed_count_key('group', pk) for pk in group_ids]
+        + [feed_count_key('follow', pk) for pk in user_ids]
+    )
+    bump_versions([SITE])
+
+
+def seed(users, groups, posts, comments, follows, random_seed=0):
+    """
+    Заполнить базу данными заданного объема с перекосом, как в живом
+    сообществе. Возвращает самых популярных автора, группу и пост
+    и самого активного читателя — на них бенчмарк и открывает страницы.
+    """
+    rnd = random.Random(random_seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(random_seed)
+    now = timezone.now()
+    with transaction.atomic():
+        bulk_insert(User, (
+            User(
+                username=f'user{number}',
+                first_name=fake.first_name(),
+                last_name=fake.last_name(),
+            )
+            for number in range(users)
+        ))
+        bulk_insert(Group, (
+            Group(
+                slug=f'group-{number}',
+                title=fake.sentence(nb_words=3),
+                description=fake.paragraph(),
+            )
+            for number in range(groups)
+        ))
+        user_ids = list(User.objects.order_by('pk').values_list(
+            'pk', flat=True))
+        group_ids = list(Group.objects.order_by('pk').values_list(
+            'pk', flat=True))
+        user_weights = zipf_weights(len(user_ids))
+        group_weights = zipf_weights(len(group_ids))
+        bulk_insert(Post, (
+            Post(
+                text=fake.text(max_nb_chars=rnd.choice((80, 300, 1000))),
+                author_id=rnd.choices(user_ids, user_weights)[0],
+                group_id=(
+                    rnd.choices(group_ids, group_weights)[0]
+                    if group_ids and rnd.random() < 0.7 else None
+                ),
+                pub_date=now - timedelta(minutes=rnd.randrange(525600)),
+            )
+            for _ in range(posts)
+        ))
+        post_ids = list(Post.objects.order_by('-pub_date').values_list(
+            'pk', flat=True))
+        post_weights = zipf_weights(len(post_ids))
+        bulk_insert(Comment, (
+            Comment(
+                text=fake.sentence(),
+                post_id=rnd.choices(post_ids, post_weights)[0],
+                author_id=rnd.choice(user_ids),
+                created=now - timedelta(minutes=rnd.randrange(525600)),
+            )
+            for _ in range(comments if post_ids else 0)
+        ))
+        bulk_insert(Follow, (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in (
+                (rnd.choice(user_ids), rnd.choices(user_ids, user_weights)[0])
+                for _ in range(follows)
+            )
+            if user_id != author_id
+        ))
+    refresh_derived_data(user_ids, group_ids)
+    reader = User.objects.order_by('-stats__following_count').first()
+    return {
+        'author': User.objects.get(pk=user_ids[0]),
+        'reader': reader,
+        'group': Group.objects.filter(pk__in=group_ids[:1]).first(),
+        'post': Post.objects.filter(pk__in=post_ids[:1]).first(),
+    }
@@ -0,0 +1,69 @@
+import time
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+VERSION_KEY = 'version:{}'
+
+
+def _now():
+    return int(time.time() * 1000)
+
+
+def get_versions(names):
+    """
+    Текущие версии по именам за один запрос к кешу.
+
+    Версия — метка времени в миллисекундах: если кеш вытеснил ключ,
+    новая версия заведомо больше прежней и старые фрагменты не оживут.
+    """
+    versions, _ = get_versions_and(names, None)
+    return versions
+
+
+def get_versions_and(names, key):
+    """
+    Версии и значение ключа ``key`` тем же запросом к кешу: запись
+    кешированной страницы читается вместе с версиями, от которых она
+    зависит.
+    """
+    keys = {VERSION_KEY.format(name): name for name in names}
+    found = cache.get_many(list(keys) + ([key] if key else []))
+    missing = [name_key for name_key in keys if name_key not in found]
+    if missing:
+        now = _now()
+        for name_key in missing:
+            cache.add(name_key, now, None)
+        found.update(cache.get_many(missing))
+    versions = {
+        name: found[name_key] for name_key, name in keys.items()
+        if name_key in found
+    }
+    return versions, found.get(key)
+
+
+def bump_versions(names):
+    """
+    Сдвинуть версии сразу и еще раз после коммита транзакции.
+
+    Иначе страница, отрисованная по данным до коммита, успела бы
+    закешироваться под новой версией.
+    """
+    names = list(names)
+    _bump(names)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump(names))
+
+
+def _bump(names):
+    # incr атомарен: две правки в одну миллисекунду дадут разные версии.
+    for name in names:
+        key = VERSION_KEY.format(name)
+        while True:
+            try:
+                cache.incr(key)
+                break
+            except ValueError:
+                # Ключ вытеснен: метка времени больше прежней версии.
+                if cache.add(key, _now(), None):
+                    break
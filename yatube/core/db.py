@@ -0,0 +1,15 @@
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Настроить каждое новое соединение SQLite по ``SQLITE_PRAGMAS``.
+
+    WAL позволяет читать во время записи, ``busy_timeout`` заставляет
+    писателя подождать блокировку вместо ошибки «database is locked».
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,159 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY_COOKIE = 'use_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Сессия с отстающей реплики разлогинила бы только что вошедшего.
+PRIMARY_APPS = ('sessions',)
+# метка снимка реплики: кто обновляет реплику, тот ее и сдвигает
+SYNCED_KEY = 'replica_synced:{}'
+
+_state = ContextVar('replica_state', default=None)
+
+
+def mark_replica_synced(alias):
+    """Записать новую метку снимка реплики (после ее обновления)."""
+    cache.set(SYNCED_KEY.format(alias), int(time.time() * 1000), None)
+
+
+@contextmanager
+def primary_reads():
+    """
+    Читать основную базу внутри блока. Так читает только то, что
+    пишет в общий кеш без метки реплики: страница гостя при промахе,
+    размер ленты, имена версий. Отстающая реплика отдала бы данные
+    старше прочитанных версий, и кеш хранил бы их под новой версией.
+    """
+    state = _state.get()
+    if state is None or state.pinned:
+        yield
+        return
+    state.pinned = True
+    try:
+        yield
+    finally:
+        # Запись в блоке закрепляет запрос за основной базой до конца.
+        state.pinned = state.wrote
+
+
+def read_freshness(alias=None):
+    """
+    Метка данных, прочитанных из ``alias`` (по умолчанию — из базы
+    текущего запроса). Кеш, заполненный по реплике, хранится с этой
+    меткой: его увидят только чтения из того же снимка.
+    """
+    if alias is None:
+        state = _state.get()
+        alias = DEFAULT_DB_ALIAS if state is None else state.read_alias()
+    if alias == DEFAULT_DB_ALIAS:
+        return ''
+    return f'@{alias}.{replica_marks().get(alias)}'
+
+
+def replica_marks():
+    """Метки снимков реплик; реплики без метки не используются."""
+    state = _state.get()
+    if state is not None and state.marks is not None:
+        return state.marks
+    keys = {SYNCED_KEY.format(alias): alias
+            for alias in settings.DATABASE_REPLICAS}
+    marks = {keys[key]: mark for key, mark in cache.get_many(keys).items()}
+    if state is not None:
+        state.marks = marks
+    return marks
+
+
+class ReplicaState:
+    __slots__ = ('pinned', 'wrote', 'replica', 'marks')
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+        self.replica = None
+        self.marks = None
+
+    def read_alias(self):
+        """
+        База для чтения. Реплика выбирается одна на запрос, чтобы метка
+        свежести в ETag и ключах кеша соответствовала прочитанному.
+        """
+        if (self.pinned or not settings.DATABASE_REPLICAS
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        if self.replica is None:
+            self.replica = random.choice(
+                sorted(replica_marks()) or [DEFAULT_DB_ALIAS]
+            )
+        return self.replica
+
+
+class ReplicaRouter:
+    """
+    Чтения внутри запроса идут на случайную реплику из
+    ``DATABASE_REPLICAS`` (одну на запрос и только с меткой снимка),
+    записи — всегда на основную базу.
+
+    На основную базу читаем и после записи в этом запросе, внутри
+    транзакции, вне запроса (команды, фоновые потоки) и пока у
+    пользователя есть кука ``use_primary`` после его собственной записи.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or model._meta.app_label in PRIMARY_APPS:
+            return DEFAULT_DB_ALIAS
+        return state.read_alias()
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики — копии основной базы, их схему не трогаем.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """
+    Разрешает чтение с реплик на время запроса. Запросы с записью
+    закрепляют пользователя за основной базой на
+    ``REPLICA_STICKY_SECONDS``, чтобы он сразу видел свои изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = ReplicaState(
+            pinned=request.method not in SAFE_METHODS
+            or PRIMARY_COOKIE in request.COOKIES
+        )
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PRIMARY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,102 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.views.decorators.http import condition
+
+from .cache_versions import get_versions, get_versions_and
+from .db_routers import primary_reads, read_freshness
+
+PAGE_KEY = 'anonymous_page:{}'
+
+
+def page_cache_key(request):
+    """Ключ страницы зависит только от адреса, версии лежат в записи."""
+    path = request.get_full_path().encode()
+    return PAGE_KEY.format(hashlib.md5(path).hexdigest())
+
+
+def versions_tag(names, versions):
+    return '|'.join(f'{name}={versions.get(name)}' for name in names)
+
+
+def page_entry(tag, response):
+    """Запись кеша: версии, тело и заголовки, которые выставил view."""
+    return tag, response.content, list(response.items())
+
+
+def cached_page(entry, tag):
+    """Ответ из записи кеша, если она снята при тех же версиях."""
+    if entry is None or entry[0] != tag:
+        return None
+    _, content, headers = entry
+    response = HttpResponse(content)
+    for name, value in headers:
+        response[name] = value
+    return response
+
+
+def cache_anonymous_page(dependencies, timeout=None):
+    """
+    Кешировать страницу целиком для неавторизованных посетителей.
+
+    ``dependencies(request, *args, **kwargs)`` возвращает имена версий,
+    от которых зависит страница. Запись хранит версии, при которых
+    страница отрисована: после записи в любую из них страница
+    перерисовывается. Ключ от версий не зависит, поэтому запись
+    и версии читаются одним запросом к кешу.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD')
+                    or request.user.is_authenticated):
+                return view(request, *args, **kwargs)
+            key = page_cache_key(request)
+            with primary_reads():
+                names = sorted(dependencies(request, *args, **kwargs))
+            versions, entry = get_versions_and(names, key)
+            tag = versions_tag(names, versions)
+            response = cached_page(entry, tag)
+            if response is not None:
+                return response
+            # Промах: страница ляжет в кеш под версиями — только
+            # по основной базе. Попадания в базу не ходят вовсе.
+            with primary_reads():
+                response = view(request, *args, **kwargs)
+            # Куки одного посетителя не должны достаться другим.
+            if (response.status_code == 200 and not response.streaming
+                    and not response.cookies):
+                cache.set(
+                    key, page_entry(tag, response),
+                    timeout or settings.PAGE_CACHE_TIMEOUT,
+                )
+            return response
+        wrapper.page_dependencies = dependencies
+        return wrapper
+    return decorator
+
+
+def conditional_on_versions(dependencies):
+    """
+    Условный GET по версиям из ``dependencies``, как у
+    ``cache_anonymous_page``: ETag — хеш адреса и версий. На совпадение
+    отвечает 304, не вызывая view. Last-Modified не отдается: в нем
+    только секунды, и две записи за секунду дали бы устаревший 304.
+    Тело читается с реплики, поэтому в ETag входит и метка ее снимка.
+    """
+    def etag(request, *args, **kwargs):
+        with primary_reads():
+            names = sorted(dependencies(request, *args, **kwargs))
+        raw = '|'.join([
+            request.get_full_path(),
+            versions_tag(names, get_versions(names)),
+            read_freshness(),
+        ])
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    conditional = condition(etag_func=etag)
+
+    return conditional
@@ -0,0 +1,90 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment,
+)
+
+from core.benchmarks import isolated_cache, runner
+from core.benchmarks.seed import DEFAULT_VOLUMES, seed
+
+# Задержки зависят от машины: базовый прогон снимается локально
+# (--save-baseline) и в git не хранится.
+BASELINE = os.path.join(
+    os.path.dirname(runner.__file__), 'baseline.json'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет тестовую базу данными и замеряет задержки и число '
+        'запросов всех страниц posts, сравнивая их с сохраненным прогоном.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_VOLUMES.items():
+            parser.add_argument(f'--{name}', type=int, default=default)
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Не очищать кеш перед запросами: замерять отдачу из кеша',
+        )
+        parser.add_argument('--baseline', default=BASELINE)
+        parser.add_argument('--save-baseline', action='store_true')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.5,
+            help='Допустимый рост p95, доля от сохраненного значения',
+        )
+
+    @isolated_cache()
+    def handle(self, *args, **options):
+        # Замеры идут в отдельной тестовой базе, рабочая не трогается.
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            data = seed(
+                **{name: options[name] for name in DEFAULT_VOLUMES},
+                random_seed=options['seed'],
+            )
+            cases = runner.view_cases(data)
+            missing = runner.missing_cases(cases)
+            if missing:
+                raise CommandError(
+                    'Нет сценария для страниц: ' + ', '.join(missing)
+                )
+            results = runner.measure(
+                cases, data['reader'], options['iterations'],
+                cold=not options['warm'],
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        self.report(results)
+        if options['save_baseline']:
+            with open(options['baseline'], 'w', encoding='utf-8') as stream:
+                json.dump(results, stream, indent=2, sort_keys=True)
+                stream.write('\n')
+            self.stdout.write(self.style.SUCCESS('Базовый прогон сохранен'))
+            return
+        if not os.path.exists(options['baseline']):
+            return
+        with open(options['baseline'], encoding='utf-8') as stream:
+            baseline = json.load(stream)
+        regressions = runner.compare(results, baseline, options['tolerance'])
+        if regressions:
+            raise CommandError('Регрессии:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"страница":<18}{"p50":>9}{"p95":>9}{"p99":>9}{"запросов":>10}'
+        )
+        for name, row in sorted(results.items()):
+            self.stdout.write(
+                f'{name:<18}{row["p50"]:>9}{row["p95"]:>9}{row["p99"]:>9}'
+                f'{row["queries"]:>10}'
+            )
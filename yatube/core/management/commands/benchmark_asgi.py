@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (
+    override_settings, setup_test_environment, teardown_test_environment,
+)
+from django.urls import reverse
+
+from core.benchmarks import isolated_cache
+from core.benchmarks.asgi import run_asgi, run_wsgi
+from core.benchmarks.seed import seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает WSGI и ASGI-вход (yatube.asgi) на гостевых страницах '
+        'из кеша с задержкой сети.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--clients', type=int, default=16,
+            help='Одновременных клиентов ASGI.',
+        )
+        parser.add_argument(
+            '--latency', type=float, default=5.0,
+            help='Задержка одного обращения к кешу, мс.',
+        )
+
+    @isolated_cache()
+    def handle(self, *args, **options):
+        # Потоки пула открывают свои соединения — нужна база в файле.
+        directory = tempfile.mkdtemp()
+        connection.settings_dict['TEST']['NAME'] = os.path.join(
+            directory, 'asgi.sqlite3'
+        )
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        caches = {'default': {
+            'BACKEND': 'core.benchmarks.asgi.SlowCache',
+            'OPTIONS': {'LATENCY': options['latency'] / 1000},
+        }}
+        try:
+            data = seed(
+                users=50, groups=5, posts=500, comments=500, follows=100,
+            )
+            pages = [
+                reverse('posts:index'),
+                reverse('posts:group_list', args=[data['group'].slug]),
+                reverse('posts:profile', args=[data['author'].username]),
+                reverse('posts:post_detail', args=[data['post'].pk]),
+            ]
+            paths = [
+                pages[i % len(pages)] for i in range(options['requests'])
+            ]
+            with override_settings(CACHES=caches, SERVER_TIMING=False):
+                # Прогрев: страницы попадают в кеш.
+                run_wsgi(pages, 1)
+                results = {
+                    'wsgi': run_wsgi(paths, options['threads']),
+                    'asgi': run_asgi(
+                        paths, options['threads'], options['clients']
+                    ),
+                }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(directory, ignore_errors=True)
+        for name, row in results.items():
+            self.stdout.write(
+                f'{name:<5} запросов/с {row["requests_per_second"]:>6}, '
+                f'p50 {row["p50_ms"]} мс, p95 {row["p95_ms"]} мс'
+            )
+        gain = (results['asgi']['requests_per_second']
+                / (results['wsgi']['requests_per_second'] or 1))
+        self.stdout.write(self.style.SUCCESS(f'ASGI: x{gain:.1f}'))
@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment,
+)
+
+from core.benchmarks import isolated_cache
+from core.benchmarks.concurrency import DEFAULT_MODE, run_mode
+from core.benchmarks.seed import seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite с настройками по '
+        'умолчанию и с SQLITE_PRAGMAS при одновременных чтениях и записях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=5.0)
+        parser.add_argument('--posts', type=int, default=2000)
+
+    @isolated_cache()
+    def handle(self, *args, **options):
+        # Блокировки проявляются только на файле, не в памяти.
+        directory = tempfile.mkdtemp()
+        connection.settings_dict['TEST']['NAME'] = os.path.join(
+            directory, 'concurrency.sqlite3'
+        )
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            data = seed(
+                users=100, groups=10, posts=options['posts'],
+                comments=options['posts'], follows=500,
+            )
+            modes = {
+                'default': DEFAULT_MODE,
+                'tuned': {
+                    'pragmas': settings.SQLITE_PRAGMAS,
+                    'persistent': True,
+                },
+            }
+            results = {
+                name: run_mode(
+                    mode['pragmas'], mode['persistent'],
+                    options['readers'], options['writers'],
+                    options['duration'], data['post'].pk, data['author'].pk,
+                )
+                for name, mode in modes.items()
+            }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(directory, ignore_errors=True)
+        for name, row in results.items():
+            self.stdout.write(
+                f'{name:<8} чтений/с {row["reads_per_second"]:>8} '
+                f'(ошибок {row["reads_errors"]}), '
+                f'записей/с {row["writes_per_second"]:>8} '
+                f'(ошибок {row["writes_errors"]})'
+            )
+        default, tuned = results['default'], results['tuned']
+        for name, title in (('reads', 'чтения'), ('writes', 'записи')):
+            before = default[f'{name}_per_second'] or 1
+            gain = tuned[f'{name}_per_second'] / before
+            self.stdout.write(self.style.SUCCESS(f'{title}: x{gain:.1f}'))
@@ -0,0 +1,33 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.db_routers import mark_replica_synced
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик из '
+        'DATABASE_REPLICAS — для проверки маршрутизации локально.'
+    )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не настроены (DATABASE_REPLICAS)')
+        connections.close_all()
+        source = sqlite3.connect(settings.DATABASES['default']['NAME'])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    # backup дает согласованный снимок даже во время записи.
+                    source.backup(target)
+                finally:
+                    target.close()
+                # Новая метка отделяет кеш по новому снимку от старого.
+                mark_replica_synced(alias)
+                self.stdout.write(self.style.SUCCESS(f'{alias} обновлена'))
+        finally:
+            source.close()
@@ -0,0 +1,89 @@
+"""
+Счетчики текущего запроса: SQL, шаблоны и кеш.
+
+Их заполняют обертка выполнения запросов, движок шаблонов
+``core.template_backends`` и кеш ``core.cache_backends``, а читает
+``core.middleware.ServerTimingMiddleware``. Вне запроса ничего не
+считается.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = (
+        'queries', 'db_time', 'template_time', 'cache_hits', 'cache_misses',
+        'template_depth', 'cache_muted',
+    )
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_depth = 0
+        self.cache_muted = 0
+
+
+def start():
+    """Завести счетчики запроса; вернуть их и токен для ``finish``."""
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish(token):
+    _current.reset(token)
+
+
+def measure_query(execute, sql, params, many, context):
+    """Обертка для ``connection.execute_wrapper``."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+@contextmanager
+def template_timer():
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    metrics.template_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.template_depth -= 1
+        # Вложенный рендер уже входит во время внешнего.
+        if not metrics.template_depth:
+            metrics.template_time += time.perf_counter() - started
+
+
+def record_cache(hits, misses):
+    metrics = _current.get()
+    if metrics is not None and not metrics.cache_muted:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+@contextmanager
+def cache_muted():
+    """Не считать обращения внутри, например ``get`` из ``get_many``."""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache_muted += 1
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.cache_muted -= 1
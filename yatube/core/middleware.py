@@ -0,0 +1,162 @@
+import logging
+import mimetypes
+import os
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connections
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import metrics
+
+logger = logging.getLogger('core.requests')
+
+
+def url_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+class ServerTimingMiddleware:
+    """
+    Число SQL-запросов и их время, время шаблонов и попадания в кеш
+    для каждого запроса: в заголовке ``Server-Timing`` и строкой лога
+    ``core.requests`` с именем страницы, например ``posts:index``.
+
+    Должен стоять первым в ``MIDDLEWARE``, чтобы учесть всю обработку.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        current, token = metrics.start()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.measure_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.finish(token)
+        total = time.perf_counter() - started
+        name = url_name(request)
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = ', '.join((
+                f'db;dur={current.db_time * 1000:.1f};'
+                f'desc="{current.queries} queries"',
+                f'tpl;dur={current.template_time * 1000:.1f}',
+                f'cache;desc="{current.cache_hits} hits '
+                f'{current.cache_misses} misses"',
+                f'total;dur={total * 1000:.1f}',
+            ))
+        logger.info(
+            'view=%s method=%s status=%s total_ms=%.1f queries=%d '
+            'db_ms=%.1f template_ms=%.1f cache_hits=%d cache_misses=%d',
+            name, request.method, response.status_code, total * 1000,
+            current.queries, current.db_time * 1000,
+            current.template_time * 1000, current.cache_hits,
+            current.cache_misses,
+            extra={
+                'view': name,
+                'status': response.status_code,
+                'total_ms': total * 1000,
+                'queries': current.queries,
+                'db_ms': current.db_time * 1000,
+                'template_ms': current.template_time * 1000,
+                'cache_hits': current.cache_hits,
+                'cache_misses': current.cache_misses,
+            },
+        )
+        return response
+
+
+def accepted_encodings(header):
+    encodings = set()
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        quality = params.strip().replace(' ', '')
+        if quality.startswith('q=') and not quality[2:].strip('0.'):
+            continue
+        encodings.add(coding.strip().lower())
+    return encodings
+
+
+class StaticFilesMiddleware:
+    """
+    Отдать собранную статику из ``STATIC_ROOT`` без обхода остальных
+    middleware. Файлы с хешем в имени кешируются браузером навсегда,
+    готовые ``.br`` и ``.gz`` отдаются клиентам, которые их принимают.
+    """
+
+    ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+    MAX_AGE = 60 * 60
+    IMMUTABLE = 'public, max-age=31536000, immutable'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.root = settings.STATIC_ROOT
+        # Манифест читается при старте процесса: множество собираем один
+        # раз, а не перебираем значения словаря на каждый запрос.
+        self.hashed_names = frozenset(
+            getattr(staticfiles_storage, 'hashed_files', {}).values()
+        )
+
+    def __call__(self, request):
+        if (request.method not in ('GET', 'HEAD')
+                or not request.path_info.startswith(self.prefix)):
+            return self.get_response(request)
+        name = request.path_info[len(self.prefix):]
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return self.get_response(request)
+        if not os.path.isfile(path):
+            return self.get_response(request)
+        return self.serve(request, name, path)
+
+    def is_hashed(self, name):
+        return name in self.hashed_names
+
+    def serve(self, request, name, path):
+        stat = os.stat(path)
+        immutable = self.is_hashed(name)
+        if not immutable and not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime, stat.st_size,
+        ):
+            return HttpResponseNotModified()
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        content_type, _ = mimetypes.guess_type(name)
+        encoding = None
+        variants = False
+        for coding, suffix in self.ENCODINGS:
+            if os.path.isfile(path + suffix):
+                variants = True
+                if encoding is None and coding in accepted:
+                    encoding, path = coding, path + suffix
+        response = FileResponse(
+            open(path, 'rb'),
+            content_type=content_type or 'application/octet-stream',
+        )
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        response['Cache-Control'] = (
+            self.IMMUTABLE if immutable
+            else f'public, max-age={self.MAX_AGE}'
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if variants:
+            response['Vary'] = 'Accept-Encoding'
+        return response
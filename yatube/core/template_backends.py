@@ -0,0 +1,71 @@
+import logging
+import os
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates, Template
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_SUFFIXES = ('.html', '.txt')
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        with metrics.template_timer():
+            return super().render(context, request)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """Шаблоны Django, которые сообщают время рендера в core.metrics."""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(
+            self.engine.from_string(template_code), self
+        )
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
+
+
+def template_dirs(engine):
+    """Каталоги всех загрузчиков движка, в том числе под cached.Loader."""
+    dirs = []
+    for loader in engine.template_loaders:
+        for inner in getattr(loader, 'loaders', [loader]):
+            dirs.extend(str(directory) for directory in inner.get_dirs())
+    return list(dict.fromkeys(dirs))
+
+
+def template_names(engine):
+    names = []
+    for directory in template_dirs(engine):
+        for root, _, files in os.walk(directory):
+            for file_name in sorted(files):
+                if file_name.endswith(TEMPLATE_SUFFIXES):
+                    path = os.path.join(root, file_name)
+                    names.append(
+                        os.path.relpath(path, directory).replace(os.sep, '/')
+                    )
+    return list(dict.fromkeys(names))
+
+
+def warm_templates():
+    """
+    Скомпилировать все шаблоны Django заранее, чтобы cached.Loader
+    не разбирал их на первых запросах. Возвращает число шаблонов.
+    """
+    warmed = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for name in template_names(backend.engine):
+            try:
+                backend.engine.get_template(name)
+            except TemplateSyntaxError:
+                logger.exception('Шаблон %s не компилируется', name)
+            else:
+                warmed += 1
+    return warmed
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import TestCase
+from django.urls import reverse
+
+from core.asgi import AsgiHandler
+from posts.models import Post, User
+
+
+def call(application, path, method='GET', body=b'', headers=()):
+    """
+    Выполнить один ASGI-запрос и вернуть статус, заголовки и тело.
+    """
+    sent = []
+    chunks = [body[:3], body[3:]]
+
+    async def receive():
+        chunk = chunks.pop(0)
+        return {'type': 'http.request', 'body': chunk,
+                'more_body': bool(chunks)}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asyncio.wait_for(application({
+        'type': 'http', 'method': method, 'path': path,
+        'query_string': b'', 'http_version': '1.1',
+        'headers': list(headers),
+    }, receive, send), timeout=5))
+    return (
+        sent[0]['status'],
+        dict(sent[0]['headers']),
+        b''.join(message.get('body', b'') for message in sent[1:]),
+    )
+
+
+class AsgiHandlerTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_wsgi_fallback(self):
+        """ Тест проверяет, что запрос с телом доходит до WSGI-приложения """
+        def wsgi_application(environ, start_response):
+            start_response('201 Created', [('X-Path', environ['PATH_INFO'])])
+            return [environ['wsgi.input'].read(), b'|',
+                    environ['HTTP_X_TEST'].encode()]
+
+        application = AsgiHandler(wsgi_application, max_workers=1)
+        status, headers, body = call(
+            application, '/path/', method='POST', body=b'payload',
+            headers=[(b'x-test', b'1')],
+        )
+        self.assertEqual(status, 201)
+        self.assertEqual(headers[b'x-path'], b'/path/')
+        self.assertEqual(body, b'payload|1')
+
+    def test_response_closed(self):
+        """
+        Тест проверяет, что ответ WSGI-приложения закрывается:
+        по close() Django закрывает соединения с базой
+        """
+        closed = []
+
+        class Result(list):
+            def close(self):
+                closed.append(True)
+
+        def wsgi_application(environ, start_response):
+            start_response('200 OK', [('Content-Length', '2')])
+            return Result([b'ok', b'lost'])
+
+        application = AsgiHandler(wsgi_application, max_workers=1)
+        status, _, body = call(application, '/')
+        self.assertEqual(body, b'ok')
+        self.assertEqual(closed, [True])
+
+    def test_thread_pool(self):
+        """ Тест проверяет, что запросы выполняются одновременно """
+        barrier = threading.Barrier(2, timeout=2)
+
+        def wsgi_application(environ, start_response):
+            barrier.wait()
+            start_response('200 OK', [])
+            return [b'ok']
+
+        application = AsgiHandler(wsgi_application, max_workers=2)
+
+        async def both():
+            await asyncio.gather(
+                asyncio.to_thread(call, application, '/'),
+                asyncio.to_thread(call, application, '/'),
+            )
+
+        asyncio.run(both())
+
+    def test_cached_page_headers(self):
+        """
+        Тест проверяет, что страница из кеша через ASGI отдается
+        с теми же заголовками, что и через WSGI
+        """
+        address = reverse('posts:index')
+        self.client.get(address)
+        expected = self.client.get(address)
+        application = AsgiHandler(WSGIHandler(), max_workers=2)
+        status, headers, body = call(application, address)
+        self.assertEqual(status, 200)
+        self.assertEqual(body, expected.content)
+        skip = {'server-timing'}
+        self.assertEqual(
+            {name.decode(): value.decode() for name, value in headers.items()
+             if name.decode() not in skip},
+            {name.lower(): value for name, value in expected.items()
+             if name.lower() not in skip},
+        )
+        status, headers, body = call(application, address, method='HEAD')
+        self.assertEqual(status, 200)
+        self.assertEqual(body, b'')
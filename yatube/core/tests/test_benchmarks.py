@@ -0,0 +1,27 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.benchmarks import runner
+from core.benchmarks.seed import seed
+from posts.models import Post
+
+
+class BenchmarkTest(TestCase):
+    def test_benchmark_covers_posts_urls(self):
+        """
+        Тест проверяет, что бенчмарк заполняет базу и проходит
+        по всем страницам posts
+        """
+        cache.clear()
+        data = seed(users=10, groups=2, posts=30, comments=40, follows=20)
+        self.assertEqual(Post.objects.count(), 30)
+        cases = runner.view_cases(data)
+        self.assertEqual(runner.missing_cases(cases), [])
+        results = runner.measure(cases, data['reader'], iterations=1)
+        self.assertEqual(set(results), set(cases))
+        # По умолчанию кеш холодный: гостевая лента идет в базу.
+        self.assertGreater(results['index']['queries'], 0)
+        slower = dict(results, index=dict(
+            results['index'], queries=results['index']['queries'] + 1
+        ))
+        self.assertEqual(len(runner.compare(slower, results, 0.5)), 1)
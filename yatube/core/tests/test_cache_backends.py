@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from core.cache_backends import SQLiteCache
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = self.make_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.location, {'OPTIONS': options})
+
+    def test_shared_between_instances(self):
+        """
+        Тест проверяет, что запись видна другому экземпляру кеша
+        (как другому процессу) и что incr атомарен
+        """
+        other = self.make_cache()
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(other.get('key'), {'value': 1})
+        self.cache.set('counter', 1)
+        self.assertEqual(other.incr('counter', 5), 6)
+        self.assertEqual(self.cache.get('counter'), 6)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+        self.assertFalse(other.add('key', 'new'))
+        other.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_versions_and_expiry(self):
+        """ Тест проверяет версии ключей и истечение срока """
+        self.cache.set('key', 'old', version=1)
+        self.cache.set('key', 'new', version=2)
+        self.assertEqual(self.cache.get('key', version=1), 'old')
+        self.assertEqual(self.cache.get_many(['key'], version=2),
+                         {'key': 'new'})
+        self.cache.set('expired', 'value', timeout=-1)
+        self.assertIsNone(self.cache.get('expired'))
+        self.assertTrue(self.cache.add('expired', 'again'))
+
+    def test_lru_eviction(self):
+        """ Тест проверяет, что вытесняются давно не читанные ключи """
+        cache = self.make_cache(MAX_ENTRIES=10, CULL_FREQUENCY=5)
+        cache.CULL_EVERY = 1
+        cache.set('hot', 'value')
+        cache.connection.execute(
+            "UPDATE cache SET accessed = accessed + 100 WHERE key LIKE '%hot'"
+        )
+        for number in range(20):
+            cache.set(f'cold{number}', number)
+        count = cache.connection.execute(
+            'SELECT COUNT(*) FROM cache').fetchone()[0]
+        self.assertLessEqual(count, 10)
+        self.assertEqual(cache.get('hot'), 'value')
@@ -0,0 +1,34 @@
+import threading
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core.cache_versions import bump_versions, get_versions
+
+
+class BumpVersionsTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_bumps(self):
+        """
+        Тест проверяет, что одновременные сдвиги версии не сливаются
+        в одно значение
+        """
+        start = get_versions(['feed:all'])['feed:all']
+        threads = [
+            threading.Thread(target=lambda: [
+                bump_versions(['feed:all']) for _ in range(50)
+            ])
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(get_versions(['feed:all'])['feed:all'], start + 400)
+
+    def test_bump_missing_key(self):
+        """ Тест проверяет, что сдвиг вытесненной версии заводит ее заново """
+        bump_versions(['feed:all'])
+        self.assertIn('feed:all', get_versions(['feed:all']))
@@ -0,0 +1,147 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.db_routers import (
+    PRIMARY_COOKIE, ReplicaMiddleware, ReplicaRouter, mark_replica_synced,
+    primary_reads,
+)
+from posts.models import Post, User
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        mark_replica_synced('replica')
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def route(self, request, write=False, primary=False):
+        """ Выполнить запрос и вернуть базу для чтения после него """
+        routed = {}
+
+        def view(request):
+            routed['before'] = self.router.db_for_read(Post)
+            if primary:
+                with primary_reads():
+                    routed['primary'] = self.router.db_for_read(Post)
+            if write:
+                self.router.db_for_write(Post)
+            routed['after'] = self.router.db_for_read(Post)
+            routed['session'] = self.router.db_for_read(Session)
+            return HttpResponse()
+
+        response = ReplicaMiddleware(view)(request)
+        return routed, response
+
+    def test_reads_go_to_replica(self):
+        """ Тест проверяет, что чтения GET-запроса идут на реплику """
+        routed, response = self.route(self.factory.get('/'))
+        self.assertEqual(routed['before'], 'replica')
+        self.assertEqual(routed['session'], 'default')
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_sticky_primary_after_write(self):
+        """
+        Тест проверяет, что после записи чтения идут на основную базу
+        и в этом запросе, и в следующих по куке
+        """
+        routed, response = self.route(self.factory.get('/'), write=True)
+        self.assertEqual(routed['after'], 'default')
+        self.assertIn(PRIMARY_COOKIE, response.cookies)
+        request = self.factory.get('/')
+        request.COOKIES[PRIMARY_COOKIE] = '1'
+        routed, _ = self.route(request)
+        self.assertEqual(routed['before'], 'default')
+        routed, _ = self.route(self.factory.post('/'))
+        self.assertEqual(routed['before'], 'default')
+
+    def test_primary_reads_block(self):
+        """
+        Тест проверяет, что основную базу читает только блок,
+        заполняющий кеш, а остальные чтения идут на реплику
+        """
+        routed, response = self.route(self.factory.get('/'), primary=True)
+        self.assertEqual(routed['primary'], 'default')
+        self.assertEqual(routed['after'], 'replica')
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+    def test_replica_without_mark(self):
+        """ Тест проверяет, что реплика без метки снимка не читается """
+        cache.clear()
+        routed, _ = self.route(self.factory.get('/'))
+        self.assertEqual(routed['before'], 'default')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaLagTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Старый')
+        # Реплика — снимок базы до правки поста, то есть отстает.
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'replica.sqlite3')
+        primary = connections['default']
+        primary.ensure_connection()
+        replica = sqlite3.connect(path)
+        primary.connection.backup(replica)
+        replica.close()
+        mark_replica_synced('replica')
+        connections.databases['replica'] = dict(
+            connections.databases['default'], NAME=path
+        )
+        self.addCleanup(connections.databases.pop, 'replica')
+        self.addCleanup(self.drop_replica_connection)
+        self.post.text = 'Новый'
+        self.post.save()
+
+    def drop_replica_connection(self):
+        # Соединение кешируется по алиасу: следующий тест берет новый файл.
+        connections['replica'].close()
+        del connections['replica']
+
+    def test_cached_page_not_from_lagging_replica(self):
+        """
+        Тест проверяет, что страница гостя не кешируется
+        по данным отстающей реплики под новой версией
+        """
+        self.assertTrue(
+            Post.objects.using('replica').filter(text='Старый').exists()
+        )
+        address = reverse('posts:post_detail', args=[self.post.pk])
+        for _ in range(2):
+            response = Client().get(address)
+            self.assertContains(response, 'Новый')
+            self.assertNotContains(response, 'Старый')
+
+    def test_listing_reads_replica(self):
+        """
+        Тест проверяет, что лента пользователя читается с реплики,
+        а карточка по ее данным не достается чтениям с основной базы
+        """
+        client = Client()
+        client.force_login(self.author)
+        with CaptureQueriesContext(connections['replica']) as queries:
+            response = client.get(reverse('posts:index'))
+        self.assertGreater(len(queries), 0)
+        self.assertContains(response, 'Старый')
+        client.cookies[PRIMARY_COOKIE] = '1'
+        response = client.get(reverse('posts:index'))
+        self.assertContains(response, 'Новый')
+        self.assertNotContains(response, 'Старый')
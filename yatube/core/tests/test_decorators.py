@@ -0,0 +1,35 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from core.decorators import cache_anonymous_page
+
+
+class CacheAnonymousPageTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+        @cache_anonymous_page(lambda request: ['site'])
+        def view(request):
+            self.calls += 1
+            response = HttpResponse('Страница', content_type='text/plain')
+            response['Content-Language'] = 'ru'
+            response['Vary'] = 'Accept-Language'
+            return response
+
+        self.view = view
+
+    def get(self):
+        request = RequestFactory().get('/page/')
+        request.user = AnonymousUser()
+        return self.view(request)
+
+    def test_hit_keeps_headers(self):
+        """ Тест проверяет, что страница из кеша сохраняет заголовки view """
+        miss = self.get()
+        hit = self.get()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(hit.content, miss.content)
+        self.assertEqual(dict(hit.items()), dict(miss.items()))
@@ -0,0 +1,172 @@
+import gzip
+import logging
+import logging.config
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponseNotFound
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, override_settings,
+)
+from django.urls import reverse
+
+from core.middleware import StaticFilesMiddleware
+from core.storage import brotli
+from posts.models import Post, User
+
+
+class ServerTimingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='auth')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def test_server_timing(self):
+        """
+        Тест проверяет заголовок Server-Timing и строку лога
+        с именем страницы и числом запросов
+        """
+        cache.clear()
+        client = Client()
+        address = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+        with self.assertLogs('core.requests', 'INFO') as logs:
+            response = client.get(address)
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('tpl;dur=', response['Server-Timing'])
+        record = logs.records[0]
+        self.assertEqual(record.view, 'posts:post_detail')
+        self.assertGreater(record.queries, 0)
+        self.assertGreater(record.cache_misses, 0)
+        with self.assertLogs('core.requests', 'INFO') as logs:
+            client.get(address)
+        # Гостю страница отдается из кеша.
+        self.assertEqual(logs.records[0].template_ms, 0)
+        self.assertGreater(logs.records[0].cache_hits, 0)
+
+    def test_prod_request_log(self):
+        """
+        Тест проверяет, что в боевых настройках строки core.requests
+        уровня INFO доходят до обработчика
+        """
+        from yatube import settings_prod
+
+        names = settings_prod.LOGGING['loggers']
+        loggers = [logging.getLogger(name) for name in names]
+        saved = [
+            (logger.handlers[:], logger.level, logger.propagate)
+            for logger in loggers
+        ]
+        stderr = StringIO()
+        try:
+            with mock.patch('sys.stderr', stderr):
+                logging.config.dictConfig(settings_prod.LOGGING)
+            Client().get(reverse('posts:index'))
+        finally:
+            for logger, state in zip(loggers, saved):
+                logger.handlers, logger.level, logger.propagate = state
+        self.assertIn('view=posts:index', stderr.getvalue())
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        """
+        Тест проверяет, что без SERVER_TIMING заголовка нет,
+        а строка лога пишется
+        """
+        with self.assertLogs('core.requests', 'INFO'):
+            response = Client().get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+class StaticFilesTest(SimpleTestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source)
+        self.addCleanup(shutil.rmtree, self.root)
+        os.mkdir(os.path.join(self.source, 'css'))
+        self.css = b'body { color: red; }\n' * 100
+        with open(os.path.join(self.source, 'css', 'site.css'), 'wb') as f:
+            f.write(self.css)
+        settings = override_settings(
+            STATIC_ROOT=self.root,
+            STATICFILES_DIRS=[self.source],
+            STATICFILES_FINDERS=[
+                'django.contrib.staticfiles.finders.FileSystemFinder',
+            ],
+            STATICFILES_STORAGE=(
+                'core.storage.CompressedManifestStaticFilesStorage'
+            ),
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.middleware = StaticFilesMiddleware(
+            lambda request: HttpResponseNotFound()
+        )
+
+    def test_precompressed_hashed_file(self):
+        """
+        Тест проверяет, что файл с хешем отдается сжатым
+        и кешируется навсегда
+        """
+        url = staticfiles_storage.url('css/site.css')
+        self.assertNotEqual(url, '/static/css/site.css')
+        request = RequestFactory().get(url, HTTP_ACCEPT_ENCODING='gzip')
+        response = self.middleware(request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), self.css)
+
+    def test_brotli_preferred(self):
+        """
+        Тест проверяет, что при поддержке обоих сжатий
+        отдается .br, а без br — .gz
+        """
+        url = staticfiles_storage.url('css/site.css')
+        path = staticfiles_storage.path(
+            staticfiles_storage.stored_name('css/site.css')
+        ) + '.br'
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(b'brotli')
+        factory = RequestFactory()
+        for accept, encoding in (('gzip, br', 'br'), ('gzip', 'gzip')):
+            with self.subTest(accept=accept):
+                response = self.middleware(
+                    factory.get(url, HTTP_ACCEPT_ENCODING=accept)
+                )
+                self.assertEqual(response['Content-Encoding'], encoding)
+                response.close()
+
+    @skipUnless(brotli, 'нужен пакет brotli')
+    def test_brotli_file(self):
+        """ Тест проверяет, что collectstatic создает копию .br """
+        name = staticfiles_storage.stored_name('css/site.css')
+        with staticfiles_storage.open(name + '.br') as f:
+            self.assertEqual(brotli.decompress(f.read()), self.css)
+
+    def test_plain_file(self):
+        """
+        Тест проверяет, что без Accept-Encoding и без хеша в имени
+        файл отдается как есть и с коротким кешем
+        """
+        response = self.middleware(
+            RequestFactory().get('/static/css/site.css')
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertEqual(b''.join(response.streaming_content), self.css)
+        missing = self.middleware(RequestFactory().get('/static/nope.css'))
+        self.assertEqual(missing.status_code, 404)
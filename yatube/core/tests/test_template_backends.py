@@ -0,0 +1,18 @@
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from core.template_backends import warm_templates
+from yatube import settings_prod
+
+
+@override_settings(TEMPLATES=settings_prod.TEMPLATES)
+class WarmTemplatesTest(SimpleTestCase):
+    def test_templates_compiled(self):
+        """ Тест проверяет, что прогрев кладет шаблоны в cached.Loader """
+        loader = engines.all()[0].engine.template_loaders[0]
+        self.assertEqual(loader.get_template_cache, {})
+        self.assertGreater(warm_templates(), 0)
+        for name in ('base.html', 'includes/post_card.html',
+                     'posts/includes/paginator.html', 'admin/base.html'):
+            with self.subTest(name=name):
+                self.assertIn(name, loader.get_template_cache)
@@ -0,0 +1,37 @@
+from itertools import islice
+
+from django.db import connections, router
+
+
+def chunked(iterable, size):
+    """Разбить поток на списки не длиннее size, не читая его целиком."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def insert_as_is(model, objs, ignore_conflicts=False):
+    """
+    Массовая вставка в режиме ``raw``, как у ``loaddata``: поля не
+    вызывают ``pre_save``, поэтому ``auto_now_add`` не заменяет заданные
+    даты текущим временем. Флаги общих полей модели не трогаем — их
+    видят все потоки процесса.
+    """
+    fields = model._meta.concrete_fields
+    using = router.db_for_write(model)
+    ops = connections[using].ops
+    with_pk = [obj for obj in objs if obj.pk is not None]
+    without_pk = [obj for obj in objs if obj.pk is None]
+    for batch, batch_fields in (
+        (with_pk, fields),
+        (without_pk, [f for f in fields if f is not model._meta.auto_field]),
+    ):
+        size = max(ops.bulk_batch_size(batch_fields, batch), 1)
+        for chunk in chunked(batch, size):
+            model._base_manager._insert(
+                chunk, fields=batch_fields, raw=True, using=using,
+                ignore_conflicts=ignore_conflicts,
+            )
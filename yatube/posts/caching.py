@@ -0,0 +1,86 @@
+from core.cache_versions import get_versions
+from core.db_routers import read_freshness
+
+from .models import Post
+
+
+def card_version_names(post):
+    names = [f'post:{post.pk}', f'user:{post.author_id}']
+    if post.group_id:
+        names.append(f'group:{post.group_id}')
+    return names
+
+
+def attach_card_versions(posts):
+    """
+    Проставить постам ``card_version`` для ключа кеша карточки.
+
+    Версии всех карточек страницы берутся одним обращением к кешу.
+    Карточка поста, прочитанного с реплики, получает метку ее снимка:
+    отрисованная по отстающим данным, она не достанется чтениям
+    с основной базы или из более нового снимка.
+    """
+    names = {post.pk: card_version_names(post) for post in posts}
+    versions = get_versions(
+        {name for post_names in names.values() for name in post_names}
+    )
+    for post in posts:
+        post.card_version = '.'.join(
+            str(versions.get(name, 0)) for name in names[post.pk]
+        ) + read_freshness(post._state.db)
+
+
+# Версии страниц для гостей. «site» сдвигается редкими правками, которые
+# видны почти везде: имя пользователя, название или слаг группы.
+SITE = 'site'
+# Список групп меняется только созданием, правкой и удалением групп.
+GROUPS = 'groups'
+
+
+def feed_page_names(post, group_slugs=()):
+    """Страницы, которые меняет создание, правка или удаление поста."""
+    names = {
+        'feed:all',
+        f'feed:post:{post.pk}',
+        f'feed:author:{post.author.username}',
+    }
+    for slug in group_slugs:
+        if slug:
+            names.add(f'feed:group:{slug}')
+    return names
+
+
+def index_page(request):
+    return [SITE, 'feed:all']
+
+
+def group_page(request, slug):
+    return [SITE, f'feed:group:{slug}']
+
+
+def profile_page(request, username):
+    return [SITE, f'feed:author:{username}']
+
+
+def post_page(request, post_id):
+    # Страница поста показывает счетчик постов автора, поэтому зависит
+    # и от ленты автора.
+    username = Post.objects.filter(pk=post_id).values_list(
+        'author__username', flat=True
+    ).first()
+    return [SITE, f'feed:post:{post_id}', f'feed:author:{username}']
+
+
+def groups_page(request):
+    return [SITE, GROUPS]
+
+
+def follow_page(request):
+    # Версию ленты сдвигают подписки и посты ее авторов, включая правки
+    # (posts.timeline.bump_timelines).
+    return [SITE, f'timeline:{request.user.pk}']
+
+
+def timeline_names(user_ids):
+    """Ленты подписок, которые меняет пост автора или подписка."""
+    return [f'timeline:{user_id}' for user_id in user_ids]
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from core.db_routers import primary_reads
+
+COUNT_KEY = 'posts:count:{feed}:{pk}'
+
+
+def feed_count_key(feed, pk=None):
+    return COUNT_KEY.format(feed=feed, pk=pk or '')
+
+
+def get_count(key, compute):
+    """
+    Взять размер ленты из кеша или посчитать его один раз — по основной
+    базе, раз результат общий для всех.
+    """
+    count = cache.get(key)
+    if count is None:
+        with primary_reads():
+            count = compute()
+        cache.add(key, count, settings.FEED_COUNT_TIMEOUT)
+    return count
+
+
+def post_feed_keys(post):
+    keys = [feed_count_key('all')]
+    if post.group_id:
+        keys.append(feed_count_key('group', post.group_id))
+    return keys
+
+
+def change_counts(keys, delta):
+    for key in keys:
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # Ключа нет в кеше — его посчитают при следующем чтении.
+            pass
+
+
+def reset_counts(keys):
+    cache.delete_many(list(keys))
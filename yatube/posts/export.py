@@ -0,0 +1,71 @@
+import csv
+import json
+
+from core.utils import chunked
+
+CHUNK_SIZE = 2000
+FIELDS = (
+    'type', 'id', 'text', 'author', 'group', 'pub_date', 'image',
+    'post', 'created',
+)
+
+
+def export_rows(author):
+    """
+    Посты и комментарии автора в формате ``import_data``.
+
+    Строки читаются курсором через ``iterator()`` кусками по
+    ``CHUNK_SIZE``, в памяти одновременно не больше одного куска.
+    """
+    posts = author.posts.order_by('pk').values_list(
+        'pk', 'text', 'group__slug', 'pub_date', 'image'
+    )
+    for pk, text, group, pub_date, image in posts.iterator(CHUNK_SIZE):
+        yield {
+            'type': 'post',
+            'id': pk,
+            'text': text,
+            'author': author.username,
+            'group': group,
+            'pub_date': pub_date.isoformat(),
+            'image': image,
+        }
+    comments = author.comments.order_by('pk').values_list(
+        'pk', 'text', 'post_id', 'created'
+    )
+    for pk, text, post_id, created in comments.iterator(CHUNK_SIZE):
+        yield {
+            'type': 'comment',
+            'id': pk,
+            'text': text,
+            'author': author.username,
+            'post': post_id,
+            'created': created.isoformat(),
+        }
+
+
+def as_jsonl(rows):
+    for chunk in chunked(rows, CHUNK_SIZE):
+        yield ''.join(
+            json.dumps(row, ensure_ascii=False) + '\n' for row in chunk
+        )
+
+
+class Echo:
+    """Файл для csv.writer, который возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def as_csv(rows):
+    writer = csv.DictWriter(Echo(), FIELDS)
+    yield writer.writeheader()
+    for chunk in chunked(rows, CHUNK_SIZE):
+        yield ''.join(writer.writerow(row) for row in chunk)
+
+
+FORMATS = {
+    'jsonl': (as_jsonl, 'application/x-ndjson'),
+    'csv': (as_csv, 'text/csv'),
+}
@@ -0,0 +1,55 @@
+import io
+import os
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps
+
+# Режимы, в которых важна прозрачность: их сохраняем в PNG.
+ALPHA_MODES = ('RGBA', 'LA', 'PA')
+
+
+def has_alpha(image):
+    return image.mode in ALPHA_MODES or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+
+
+def normalize_image(upload):
+    """
+    Привести загруженную картинку к виду, в котором она хранится.
+
+    Размеры проверяются по заголовку, до декодирования. Поворот
+    из EXIF применяется к пикселям, метаданные отбрасываются, длинная
+    сторона ограничена ``IMAGE_MAX_SIDE``. Без прозрачности картинка
+    сохраняется в JPEG с качеством ``IMAGE_QUALITY``, иначе в PNG.
+    """
+    upload.seek(0)
+    image = Image.open(upload)
+    width, height = image.size
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка слишком большая: %(width)s×%(height)s',
+            code='image_too_large',
+            params={'width': width, 'height': height},
+        )
+    max_side = settings.IMAGE_MAX_SIDE
+    # JPEG декодируется сразу в уменьшенном масштабе.
+    image.draft('RGB', (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    buffer = io.BytesIO()
+    if has_alpha(image):
+        extension, content_type = 'png', 'image/png'
+        image.convert('RGBA').save(buffer, 'PNG', optimize=True)
+    else:
+        extension, content_type = 'jpg', 'image/jpeg'
+        image.convert('RGB').save(
+            buffer, 'JPEG', quality=settings.IMAGE_QUALITY,
+            optimize=True, progressive=True,
+        )
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    return SimpleUploadedFile(
+        f'{name}.{extension}', buffer.getvalue(), content_type
+    )
@@ -0,0 +1,285 @@
+import csv
+import json
+
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.cache_versions import bump_versions
+from core.utils import chunked, insert_as_is
+
+from .caching import timeline_names
+from .counters import feed_count_key, reset_counts
+from .models import Comment, Follow, Group, Post, User
+from .search import index_posts
+from .stats import recount_all_stats
+from .timeline import add_follow_entries, fan_out_posts
+
+BATCH_SIZE = 1000
+TRANSACTION_ROWS = 20000
+# Сколько ошибок с номерами строк запоминать; пропущенные строки
+# считаются все.
+MAX_ERRORS = 100
+MODELS = {'post': Post, 'comment': Comment, 'follow': Follow}
+TYPES = tuple(MODELS)
+
+
+class RowError(ValueError):
+    """Строка входа, которую нельзя загрузить."""
+
+
+def read_jsonl(stream):
+    """Пары (номер строки, объект); битый JSON дает вместо объекта None."""
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row
+
+
+def read_csv(stream):
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def require(row, *fields):
+    for field in fields:
+        if not row.get(field):
+            raise RowError(f'нет поля {field}')
+
+
+def parse_id(value, field):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        number = 0
+    if number <= 0:
+        raise RowError(f'{field}: ожидается положительное целое')
+    return number
+
+
+def parse_date(value, field):
+    if not value:
+        return timezone.now()
+    try:
+        date = parse_datetime(value)
+    except (TypeError, ValueError):
+        date = None
+    if date is None:
+        raise RowError(f'{field}: некорректная дата {value!r}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+class Importer:
+    """
+    Потоковая загрузка постов, комментариев и подписок.
+
+    Строки читаются по одной и копятся в буферах не длиннее
+    ``batch_size``; каждые ``transaction_rows`` строк транзакция
+    фиксируется. В памяти живут только буферы и словари пользователей
+    и групп, поэтому объем входа на расход памяти не влияет.
+    Посты с ``id`` сохраняют его, чтобы на них могли ссылаться
+    комментарии из того же файла.
+
+    Строки с ошибками пропускаются, а номера строк и причины
+    копятся в ``errors``. Производные данные — счетчики, ленты
+    подписок, поисковый индекс и версии страниц — обновляются после
+    каждой пачки и только для загруженных в ней строк.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE,
+                 transaction_rows=TRANSACTION_ROWS, default_type=None):
+        self.batch_size = batch_size
+        self.transaction_rows = transaction_rows
+        self.default_type = default_type
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.buffers = {kind: [] for kind in TYPES}
+        self.imported = dict.fromkeys(TYPES, 0)
+        self.skipped = 0
+        self.errors = []
+
+    def run(self, rows):
+        """Загрузить пары (номер строки, строка) от ``read_*``."""
+        for chunk in chunked(rows, self.transaction_rows):
+            with transaction.atomic():
+                for line, row in chunk:
+                    self.add(line, row)
+                self.flush_all()
+        return self.imported
+
+    def reject(self, line, reason):
+        self.skipped += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, str(reason)))
+
+    def add(self, line, row):
+        try:
+            kind, obj = self.build(row)
+        except RowError as error:
+            self.reject(line, error)
+            return
+        self.buffers[kind].append((line, obj))
+        if len(self.buffers[kind]) >= self.batch_size:
+            self.flush(kind)
+
+    def build(self, row):
+        if not isinstance(row, dict):
+            raise RowError('строка не разбирается как объект JSON')
+        kind = row.get('type') or self.default_type
+        if kind not in TYPES:
+            raise RowError(f'неизвестный тип {kind!r}')
+        return kind, getattr(self, f'build_{kind}')(row)
+
+    def author_id(self, username):
+        if username not in self.users:
+            self.users[username] = User.objects.create(username=username).pk
+        return self.users[username]
+
+    def group_id(self, slug):
+        if not slug:
+            return None
+        if slug not in self.groups:
+            self.groups[slug] = Group.objects.create(slug=slug, title=slug).pk
+        return self.groups[slug]
+
+    # Поля проверяются до author_id и group_id: битая строка не должна
+    # заводить пользователей и группы.
+    def build_post(self, row):
+        require(row, 'text', 'author')
+        pk = parse_id(row['id'], 'id') if row.get('id') else None
+        pub_date = parse_date(row.get('pub_date'), 'pub_date')
+        return Post(
+            pk=pk,
+            text=row['text'],
+            author_id=self.author_id(row['author']),
+            group_id=self.group_id(row.get('group')),
+            pub_date=pub_date,
+            image=row.get('image') or '',
+        )
+
+    def build_comment(self, row):
+        require(row, 'text', 'author', 'post')
+        post_id = parse_id(row['post'], 'post')
+        created = parse_date(row.get('created'), 'created')
+        return Comment(
+            text=row['text'],
+            post_id=post_id,
+            author_id=self.author_id(row['author']),
+            created=created,
+        )
+
+    def build_follow(self, row):
+        require(row, 'user', 'author')
+        if row['user'] == row['author']:
+            raise RowError('подписка на самого себя')
+        return Follow(
+            user_id=self.author_id(row['user']),
+            author_id=self.author_id(row['author']),
+        )
+
+    def new_posts(self, rows):
+        """Пост с уже занятым id отклоняем, а не ловим IntegrityError."""
+        taken = set(Post.objects.filter(
+            pk__in={obj.pk for _, obj in rows if obj.pk is not None}
+        ).values_list('pk', flat=True))
+        kept = []
+        for line, obj in rows:
+            if obj.pk in taken:
+                self.reject(line, f'пост с id {obj.pk} уже есть')
+                continue
+            if obj.pk is not None:
+                taken.add(obj.pk)
+            kept.append((line, obj))
+        return kept
+
+    def known_posts(self, rows):
+        found = set(Post.objects.filter(
+            pk__in={obj.post_id for _, obj in rows}
+        ).values_list('pk', flat=True))
+        kept = []
+        for line, obj in rows:
+            if obj.post_id in found:
+                kept.append((line, obj))
+            else:
+                self.reject(line, f'нет поста с id {obj.post_id}')
+        return kept
+
+    def flush(self, kind):
+        if kind == 'comment':
+            # Комментарии ссылаются на посты: сначала дописываем их.
+            self.flush('post')
+        rows = self.buffers[kind]
+        if not rows:
+            return
+        self.buffers[kind] = []
+        if kind == 'post':
+            rows = self.new_posts(rows)
+        elif kind == 'comment':
+            rows = self.known_posts(rows)
+        objs = [obj for _, obj in rows]
+        getattr(self, f'insert_{kind}s')(objs)
+        self.imported[kind] += len(objs)
+
+    def insert_posts(self, posts):
+        # В SQLite вставка не возвращает id: новые посты без id — это
+        # те, что легли выше прежнего максимума.
+        last = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+        insert_as_is(Post, posts)
+        posts = list(Post.objects.filter(
+            Q(pk__gt=last)
+            | Q(pk__in=[post.pk for post in posts if post.pk is not None])
+        ).select_related('author', 'group'))
+        if not posts:
+            return
+        index_posts(post.pk for post in posts)
+        followers = fan_out_posts(posts)
+        recount_all_stats({post.author_id for post in posts})
+        groups = {post.group for post in posts if post.group_id}
+        reset_counts(
+            [feed_count_key('all')]
+            + [feed_count_key('group', group.pk) for group in groups]
+            + [feed_count_key('follow', pk) for pk in followers]
+        )
+        bump_versions(
+            ['feed:all']
+            + [f'feed:group:{group.slug}' for group in groups]
+            + [f'feed:author:{slug}' for slug in {
+                post.author.username for post in posts
+            }]
+        )
+
+    def insert_comments(self, comments):
+        insert_as_is(Comment, comments)
+        bump_versions(
+            {f'feed:post:{comment.post_id}' for comment in comments}
+        )
+
+    def insert_follows(self, follows):
+        # Повторная подписка не ошибка: уникальность держит база.
+        insert_as_is(Follow, follows, ignore_conflicts=True)
+        pairs = {(follow.user_id, follow.author_id) for follow in follows}
+        for user_id, author_id in pairs:
+            add_follow_entries(user_id, author_id)
+        user_ids = {user_id for user_id, _ in pairs}
+        profile_ids = user_ids | {author_id for _, author_id in pairs}
+        recount_all_stats(profile_ids)
+        reset_counts(feed_count_key('follow', pk) for pk in user_ids)
+        bump_versions(
+            [f'feed:author:{username}' for username in
+             User.objects.filter(pk__in=profile_ids).values_list(
+                 'username', flat=True)]
+            + timeline_names(user_ids)
+        )
+
+    def flush_all(self):
+        for kind in TYPES:
+            self.flush(kind)
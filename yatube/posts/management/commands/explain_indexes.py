@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Post, TimelineEntry
+from posts.paginators import KeysetPaginator
+
+
+def keyset(queryset, ordering=('-pub_date', '-pk')):
+    """Запрос следующей страницы так, как его строит пагинатор."""
+    pages = KeysetPaginator(queryset, 10, ordering=ordering)
+    values = [timezone.now(), 1]
+    return pages.object_list.filter(pages._seek(values, forward=True))
+
+
+def hot_queries():
+    if connection.vendor == 'sqlite':
+        unique_follow = 'sqlite_autoindex_posts_follow'
+    else:
+        unique_follow = 'unique_follow'
+    feed = ('-pub_date', '-pk')
+    return (
+        ('index', Post.objects.order_by(*feed), 'post_date_idx'),
+        ('index_cursor', keyset(Post.objects.all()), 'post_date_idx'),
+        ('group', Post.objects.filter(group_id=1).order_by(*feed),
+         'post_group_date_idx'),
+        ('group_cursor', keyset(Post.objects.filter(group_id=1)),
+         'post_group_date_idx'),
+        ('profile', Post.objects.filter(author_id=1).order_by(*feed),
+         'post_author_date_idx'),
+        ('profile_cursor', keyset(Post.objects.filter(author_id=1)),
+         'post_author_date_idx'),
+        ('comments', Comment.objects.filter(post_id=1).order_by(
+            'created', 'pk'), 'comment_post_created_idx'),
+        ('follow_index', TimelineEntry.objects.filter(user_id=1).order_by(
+            '-pub_date', '-post_id'), 'timeline_user_date_idx'),
+        ('follow_index_cursor', keyset(
+            TimelineEntry.objects.filter(user_id=1), ('-pub_date', '-post_id')
+        ), 'timeline_user_date_idx'),
+        ('following', Follow.objects.filter(user_id=1, author_id=2),
+         unique_follow),
+        ('followers', Follow.objects.filter(author_id=1).values_list(
+            'user_id'), 'follow_author_user_idx'),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Печатает план выполнения горячих запросов лент и проверяет, '
+        'что каждый из них использует свой составной индекс.'
+    )
+
+    def handle(self, *args, **options):
+        missing = []
+        for name, queryset, index in hot_queries():
+            plan = queryset.explain()
+            used = index in plan
+            if not used:
+                missing.append(name)
+            self.stdout.write(
+                f'{name}: {index} {"OK" if used else "НЕ ИСПОЛЬЗУЕТСЯ"}'
+            )
+            self.stdout.write(f'  {plan}')
+        if missing:
+            raise CommandError(
+                'Запросы без ожидаемого индекса: ' + ', '.join(missing)
+            )
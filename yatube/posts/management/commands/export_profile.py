@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import FORMATS, export_rows
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает посты и комментарии пользователя.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--format', choices=tuple(FORMATS), default='jsonl'
+        )
+        parser.add_argument(
+            '--output', default='-', help='Файл для выгрузки или - для stdout'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            author = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError('Пользователь не найден')
+        serialize, _ = FORMATS[options['format']]
+        chunks = serialize(export_rows(author))
+        if options['output'] == '-':
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8',
+                  newline='') as stream:
+            stream.writelines(chunks)
@@ -0,0 +1,35 @@
+from concurrent.futures import wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.cache_versions import bump_versions
+from core.utils import chunked
+from posts.caching import SITE
+from posts.models import Post
+from posts.thumbnails import submit_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Создает миниатюры для всех уже загруженных картинок постов.'
+
+    def handle(self, *args, **options):
+        images = Post.objects.exclude(image='').order_by().values_list(
+            'image', flat=True
+        )
+        total = 0
+        # Ждем каждую пачку, чтобы очередь пула не росла без ограничений.
+        for chunk in chunked(images.iterator(),
+                             max(settings.THUMBNAIL_WORKERS, 1) * 4):
+            futures = []
+            for name in chunk:
+                futures.extend(submit_thumbnails(name, block=True))
+            wait(futures)
+            total += len(chunk)
+        if total:
+            # Одна версия на все страницы вместо сдвига лент по каждой
+            # картинке.
+            bump_versions([SITE])
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано картинок: {total}')
+        )
@@ -0,0 +1,54 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts.importer import (
+    BATCH_SIZE, TRANSACTION_ROWS, TYPES, Importer, read_csv, read_jsonl,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает посты, комментарии и подписки из JSONL или CSV. '
+        'Тип строки берется из поля type или из --type.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с данными или - для stdin')
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'), default=None,
+            help='Формат входа; по умолчанию по расширению файла',
+        )
+        parser.add_argument('--type', choices=TYPES, default=None)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--transaction-rows', type=int, default=TRANSACTION_ROWS
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        data_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl'
+        )
+        reader = read_csv if data_format == 'csv' else read_jsonl
+        importer = Importer(
+            batch_size=options['batch_size'],
+            transaction_rows=options['transaction_rows'],
+            default_type=options['type'],
+        )
+        if path == '-':
+            imported = importer.run(reader(sys.stdin))
+        else:
+            with open(path, encoding='utf-8', newline='') as stream:
+                imported = importer.run(reader(stream))
+        summary = ', '.join(f'{kind}: {count}'
+                            for kind, count in imported.items())
+        for line, reason in importer.errors:
+            self.stderr.write(f'Строка {line}: {reason}')
+        if importer.skipped > len(importer.errors):
+            self.stderr.write(
+                f'... и еще {importer.skipped - len(importer.errors)}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено {summary}; пропущено строк: {importer.skipped}'
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.stats import recount_all_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счетчики постов, подписчиков и подписок '
+        'всех профилей, если они разошлись с данными.'
+    )
+
+    def handle(self, *args, **options):
+        recount_all_stats()
+        self.stdout.write(self.style.SUCCESS('Статистика профилей обновлена'))
@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-18 14:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+CREATE_INDEX = '''
+CREATE VIRTUAL TABLE posts_post_fts USING fts5(
+    text, group_title, tokenize = 'unicode61 remove_diacritics 2'
+)
+'''
+
+FILL_INDEX = '''
+INSERT INTO posts_post_fts (rowid, text, group_title)
+SELECT posts_post.id, posts_post.text, COALESCE(posts_group.title, '')
+FROM posts_post LEFT JOIN posts_group ON posts_group.id = posts_post.group_id
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_profilestats'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [CREATE_INDEX, FILL_INDEX], 'DROP TABLE posts_post_fts'
+        ),
+        migrations.CreateModel(
+            name='PostSearch',
+            fields=[
+                ('post', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='+', serialize=False, to='posts.Post')),
+                ('text', models.TextField()),
+                ('group_title', models.TextField()),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'posts_post_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,224 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .counters import get_count
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class KeysetPaginator(Paginator):
+    """
+    Пагинатор, который листает ленту по ключу сортировки, а не по OFFSET.
+
+    Ссылки «вперёд» и «назад» строятся курсором — значениями полей
+    ``ordering`` крайней записи страницы, поэтому глубокие страницы
+    читаются диапазоном по индексу. Номер страницы ``?page=`` по-прежнему
+    поддерживается как точка входа.
+
+    С ``count_key`` размер ленты берётся из кеша счётчиков, а не из
+    ``COUNT(*)`` на каждый запрос; уже известный размер можно передать
+    в ``count``. Такой размер — оценка: по нему строятся номера страниц,
+    но сами страницы читаются только от начала ленты.
+    """
+
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-pk'),
+                 count_key=None, count=None, **kwargs):
+        self.ordering = tuple(ordering)
+        self.count_key = count_key
+        self.known_count = count
+        super().__init__(object_list.order_by(*self.ordering), per_page,
+                         **kwargs)
+
+    @cached_property
+    def count(self):
+        if self.known_count is not None:
+            return self.known_count
+        if self.count_key is None:
+            return self.object_list.count()
+        return get_count(self.count_key, self.object_list.count)
+
+    def get_page(self, number, cursor=None):
+        if cursor:
+            try:
+                return self.cursor_page(cursor)
+            except InvalidPage:
+                pass
+        return super().get_page(number)
+
+    @property
+    def exact_count(self):
+        """Размер посчитан ``COUNT(*)`` сейчас, а не взят из кеша."""
+        return self.count_key is None and self.known_count is None
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if not self.exact_count:
+            # Размер из кеша — оценка: с конца по ней читать нельзя,
+            # иначе страницы сдвинутся. Лишняя строка покажет, есть ли
+            # следующая страница.
+            rows = list(self.object_list[bottom:top + 1])
+            has_next = len(rows) > self.per_page
+            return self._numbered_page(rows[:self.per_page], number,
+                                       has_next)
+        if self.orphans and top + self.orphans >= self.count:
+            top = self.count
+        tail = max(self.count - top, 0)
+        if tail < bottom:
+            # Ближе к концу ленты дешевле отступить от конца.
+            rows = list(
+                self.object_list.reverse()[tail:self.count - bottom]
+            )
+            rows.reverse()
+        else:
+            rows = list(self.object_list[bottom:top])
+        return self._numbered_page(rows, number, number < self.num_pages)
+
+    def _numbered_page(self, rows, number, has_next):
+        page = self._get_page(rows, number, self)
+        page.previous_cursor = page.next_cursor = None
+        if rows and number > 1:
+            page.previous_cursor = self.encode_cursor(
+                number - 1, PREVIOUS, rows[0])
+        if rows and has_next:
+            page.next_cursor = self.encode_cursor(number + 1, NEXT, rows[-1])
+        return page
+
+    def seek_page(self, cursor=None):
+        """
+        Страница по курсору «вперед» без подсчета записей: по лишней
+        строке видно, есть ли следующая. Номеров страниц и ссылки назад
+        у нее нет; некорректный курсор дает первую страницу.
+        """
+        queryset, number = self.object_list, 1
+        if cursor:
+            try:
+                number, direction, values = self.decode_cursor(cursor)
+            except InvalidPage:
+                direction = None
+            if direction == NEXT:
+                queryset = queryset.filter(self._seek(values, forward=True))
+            else:
+                number = 1
+        rows = list(queryset[:self.per_page + 1])
+        page = self._get_page(rows[:self.per_page], number, self)
+        page.previous_cursor = page.next_cursor = None
+        if len(rows) > self.per_page:
+            page.next_cursor = self.encode_cursor(
+                number + 1, NEXT, rows[self.per_page - 1])
+        return page
+
+    def get_elided_page_range(self, number=1, on_each_side=2, on_ends=1):
+        """
+        Номера страниц вокруг текущей и по краям ленты, пропуски заменены
+        на ``ELLIPSIS``. Длина не зависит от количества страниц.
+        """
+        number = min(max(int(number), 1), self.num_pages)
+        if self.num_pages <= (on_each_side + on_ends) * 2 + 1:
+            return list(self.page_range)
+        pages = []
+        if number > on_each_side + on_ends + 2:
+            pages.extend(range(1, on_ends + 1))
+            pages.append(self.ELLIPSIS)
+            pages.extend(range(number - on_each_side, number + 1))
+        else:
+            pages.extend(range(1, number + 1))
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            pages.extend(range(number + 1, number + on_each_side + 1))
+            pages.append(self.ELLIPSIS)
+            pages.extend(
+                range(self.num_pages - on_ends + 1, self.num_pages + 1)
+            )
+        else:
+            pages.extend(range(number + 1, self.num_pages + 1))
+        return pages
+
+    def cursor_page(self, cursor):
+        """Вернуть страницу, соседнюю с записью из курсора."""
+        number, direction, values = self.decode_cursor(cursor)
+        forward = direction == NEXT
+        queryset = self.object_list.filter(self._seek(values, forward))
+        if not forward:
+            queryset = queryset.reverse()
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not rows:
+            raise InvalidPage('Курсор указывает за пределы ленты')
+        if forward:
+            has_next, has_previous = has_more, True
+        else:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        number = max(number, 2) if has_previous else 1
+        page = self._get_page(rows, number, self)
+        page.previous_cursor = page.next_cursor = None
+        if has_next:
+            page.next_cursor = self.encode_cursor(number + 1, NEXT, rows[-1])
+        if has_previous:
+            page.previous_cursor = self.encode_cursor(
+                number - 1, PREVIOUS, rows[0])
+        return page
+
+    def encode_cursor(self, number, direction, obj):
+        values = []
+        for name in self.ordering:
+            value = getattr(obj, name.lstrip('-'))
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+        data = json.dumps([number, direction, values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(cursor + padding)
+            number, direction, values = json.loads(raw.decode())
+            number = int(number)
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+            raise InvalidPage('Некорректный курсор')
+        if (direction not in (NEXT, PREVIOUS)
+                or not isinstance(values, list)
+                or len(values) != len(self.ordering)):
+            raise InvalidPage('Некорректный курсор')
+        opts = self.object_list.model._meta
+        fields = [
+            opts.pk if name.lstrip('-') == 'pk'
+            else opts.get_field(name.lstrip('-'))
+            for name in self.ordering
+        ]
+        try:
+            values = [
+                field.to_python(value)
+                for field, value in zip(fields, values)
+            ]
+        except ValidationError:
+            raise InvalidPage('Некорректный курсор')
+        return number, direction, values
+
+    def _seek(self, values, forward):
+        """Условие «строго после» (или «строго до») ключа сортировки."""
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, values):
+            descending = name.startswith('-')
+            field = name.lstrip('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        # Нестрогая граница по первому полю превращает условие в диапазон
+        # по индексу, иначе SQLite проверяет OR на каждой строке.
+        name = self.ordering[0]
+        lookup = 'lte' if name.startswith('-') == forward else 'gte'
+        return Q(**{f'{name.lstrip("-")}__{lookup}': values[0]}) & condition
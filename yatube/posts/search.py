@@ -0,0 +1,92 @@
+import re
+
+from django.db import connection
+
+from .models import PostSearch
+
+# Параметров в одном запросе SQLite бывает не больше 999.
+BATCH_SIZE = 500
+
+INDEX_POSTS = '''
+INSERT INTO posts_post_fts (rowid, text, group_title)
+SELECT posts_post.id, posts_post.text, COALESCE(posts_group.title, '')
+FROM posts_post LEFT JOIN posts_group ON posts_group.id = posts_post.group_id
+'''
+
+
+def match_query(text):
+    """
+    Запрос FTS5 из пользовательского ввода: каждое слово в кавычках,
+    чтобы операторы FTS5 не ломали разбор, последнее — по префиксу.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return ''
+    return ' '.join(f'"{word}"' for word in words) + '*'
+
+
+def search_posts(text):
+    query = match_query(text)
+    if not query:
+        return PostSearch.objects.none()
+    return PostSearch.objects.filter(match=query).defer(
+        'text', 'group_title', 'match'
+    )
+
+
+def _reindex(condition, params):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM posts_post_fts WHERE rowid IN '
+            f'(SELECT posts_post.id FROM posts_post WHERE {condition})',
+            params,
+        )
+        cursor.execute(f'{INDEX_POSTS} WHERE {condition}', params)
+
+
+def index_post(post_id):
+    _reindex('posts_post.id = %s', [post_id])
+
+
+def index_posts(post_ids):
+    """Проиндексировать пачку постов, например после массовой загрузки."""
+    post_ids = list(post_ids)
+    for start in range(0, len(post_ids), BATCH_SIZE):
+        chunk = post_ids[start:start + BATCH_SIZE]
+        _reindex(
+            'posts_post.id IN ({})'.format(', '.join(['%s'] * len(chunk))),
+            chunk,
+        )
+
+
+def index_group(group_id):
+    """Обновить название группы у всех ее постов."""
+    _reindex('posts_post.group_id = %s', [group_id])
+
+
+def clear_group(group_id):
+    """Убрать название удаляемой группы: посты останутся без группы."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "UPDATE posts_post_fts SET group_title = '' WHERE rowid IN "
+            '(SELECT posts_post.id FROM posts_post '
+            'WHERE posts_post.group_id = %s)',
+            [group_id],
+        )
+
+
+def unindex_post(post_id):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM posts_post_fts WHERE rowid = %s', [post_id]
+        )
+
+
+def rebuild_index():
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM posts_post_fts')
+        cursor.execute(INDEX_POSTS)
+        # Сливаем сегменты индекса в один после массовой вставки.
+        cursor.execute(
+            "INSERT INTO posts_post_fts (posts_post_fts) VALUES ('optimize')"
+        )
@@ -0,0 +1,143 @@
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+
+from core.cache_versions import bump_versions
+
+from .caching import GROUPS, SITE, feed_page_names, timeline_names
+from .counters import (
+    change_counts, feed_count_key, post_feed_keys, reset_counts,
+)
+from .models import Comment, Follow, Group, Post, ProfileStats, User
+from .search import clear_group, index_group, index_post, unindex_post
+from .stats import change_stats
+from .timeline import (
+    add_follow_entries, bump_timelines, fan_out_post, remove_follow_entries,
+)
+
+
+def follower_ids(author_id):
+    return list(Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True))
+
+
+def follower_count_keys(followers):
+    return [feed_count_key('follow', user_id) for user_id in followers]
+
+
+def post_group_slug(post):
+    return post.group.slug if post.group_id else None
+
+
+def follow_page_names(follow):
+    # Счетчики подписчиков и подписок видны на страницах обоих профилей.
+    return [
+        f'feed:author:{follow.author.username}',
+        f'feed:author:{follow.user.username}',
+    ] + timeline_names([follow.user_id])
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    if created:
+        ProfileStats.objects.get_or_create(user=instance)
+        return
+    # Вход пользователя обновляет только last_login — карточки не меняются.
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    bump_versions([f'user:{instance.pk}', SITE])
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+def site_object_deleted(sender, instance, **kwargs):
+    bump_versions([SITE, GROUPS] if sender is Group else [SITE])
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if created:
+        bump_versions([GROUPS])
+        return
+    index_group(instance.pk)
+    bump_versions([f'group:{instance.pk}', SITE, GROUPS])
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    # Посты отвязываются от группы через UPDATE, без сигналов.
+    clear_group(instance.pk)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    if not instance._state.adding and instance.pk:
+        instance._saved_group_id, instance._saved_group_slug = (
+            Post.objects.filter(pk=instance.pk).values_list(
+                'group_id', 'group__slug'
+            ).first() or (None, None)
+        )
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    index_post(instance.pk)
+    if created:
+        followers = fan_out_post(instance)
+        change_stats(instance.author_id, posts_count=1)
+        change_counts(post_feed_keys(instance), 1)
+        reset_counts(follower_count_keys(followers))
+        bump_versions(feed_page_names(instance, [post_group_slug(instance)]))
+        return
+    # Лента подписок зависит только от версии подписчика.
+    bump_timelines(follower_ids(instance.author_id))
+    saved_group_slug = getattr(instance, '_saved_group_slug', None)
+    bump_versions(
+        [f'post:{instance.pk}'] + list(feed_page_names(
+            instance, [post_group_slug(instance), saved_group_slug]
+        ))
+    )
+    saved_group_id = getattr(instance, '_saved_group_id', None)
+    if saved_group_id != instance.group_id:
+        reset_counts(
+            feed_count_key('group', group_id)
+            for group_id in (saved_group_id, instance.group_id) if group_id
+        )
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    unindex_post(instance.pk)
+    followers = follower_ids(instance.author_id)
+    bump_versions(feed_page_names(instance, [post_group_slug(instance)]))
+    bump_timelines(followers)
+    change_stats(instance.author_id, posts_count=-1)
+    change_counts(post_feed_keys(instance), -1)
+    reset_counts(follower_count_keys(followers))
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        add_follow_entries(instance.user_id, instance.author_id)
+        change_stats(instance.author_id, followers_count=1)
+        change_stats(instance.user_id, following_count=1)
+    reset_counts([feed_count_key('follow', instance.user_id)])
+    bump_versions(follow_page_names(instance))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    remove_follow_entries(instance.user_id, instance.author_id)
+    change_stats(instance.author_id, followers_count=-1)
+    change_stats(instance.user_id, following_count=-1)
+    reset_counts([feed_count_key('follow', instance.user_id)])
+    bump_versions(follow_page_names(instance))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    bump_versions([f'feed:post:{instance.post_id}'])
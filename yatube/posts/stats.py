@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.utils import chunked
+
+from .models import Follow, Post, ProfileStats, User
+
+BATCH_SIZE = 1000
+
+
+def change_stats(user_id, **deltas):
+    """
+    Сдвинуть счетчики профиля в той же транзакции, что и запись.
+
+    Если строки статистики нет, она будет посчитана при чтении.
+    """
+    stats = ProfileStats.objects.filter(user_id=user_id)
+    for field, delta in deltas.items():
+        if delta < 0:
+            stats = stats.filter(**{f'{field}__gte': -delta})
+    stats.update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+def recount_stats(user_id):
+    stats, _ = ProfileStats.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            'posts_count': Post.objects.filter(author_id=user_id).count(),
+            'followers_count': Follow.objects.filter(
+                author_id=user_id
+            ).count(),
+            'following_count': Follow.objects.filter(
+                user_id=user_id
+            ).count(),
+        },
+    )
+    return stats
+
+
+def get_stats(user):
+    try:
+        return user.stats
+    except ProfileStats.DoesNotExist:
+        return recount_stats(user.pk)
+
+
+def _count(queryset, field):
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+        field
+    ).annotate(total=Count('pk')).values('total')
+    return Coalesce(
+        Subquery(counts, output_field=IntegerField()), 0
+    )
+
+
+def recount_all_stats(user_ids=None):
+    """Пересчитать заново статистику всех профилей или только user_ids."""
+    users = User.objects.all()
+    stats = ProfileStats.objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+        stats = stats.filter(user_id__in=user_ids)
+    users = users.annotate(
+        posts_total=_count(Post.objects.all(), 'author'),
+        followers_total=_count(Follow.objects.all(), 'author'),
+        following_total=_count(Follow.objects.all(), 'user'),
+    ).values_list(
+        'pk', 'posts_total', 'followers_total', 'following_total'
+    )
+    rows = (
+        ProfileStats(
+            user_id=user_id,
+            posts_count=posts,
+            followers_count=followers,
+            following_count=following,
+        )
+        for user_id, posts, followers, following in users.iterator()
+    )
+    with transaction.atomic():
+        stats.delete()
+        for chunk in chunked(rows, BATCH_SIZE):
+            ProfileStats.objects.bulk_create(chunk)
@@ -1,7 +1,10 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase, Client
 from django.urls import reverse
 
-from ..models import User, Post
+from ..models import User, Post, ProfileStats
 
 
 class FollowTest(TestCase):
@@ -67,3 +70,48 @@ class FollowTest(TestCase):
         )
         count_follows = self.user1.following.all().count()
         self.assertEqual(count_follows, 0)
+
+    def test_follow_timeline(self):
+        """
+        Тест проверяет, что лента подписок заполняется при подписке
+        и публикации и очищается при отписке и удалении поста
+        """
+        self.follow(self.user1)
+        self.assertTrue(
+            self.user2.timeline.filter(post=self.post).exists()
+        )
+        new_post = Post.objects.create(text='Новый пост', author=self.user1)
+        self.assertEqual(self.user2.timeline.count(), 2)
+        self.assertFalse(self.user3.timeline.exists())
+        response = self.client2.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['page_obj'][0], new_post)
+        new_post.delete()
+        self.assertEqual(self.user2.timeline.count(), 1)
+        self.client2.get(
+            reverse('posts:profile_unfollow',
+                    kwargs={'username': self.user1.username}
+                    ),
+        )
+        self.assertFalse(self.user2.timeline.exists())
+
+    def test_profile_stats(self):
+        """
+        Тест проверяет счетчики профиля при подписке, публикации,
+        удалении поста и их пересчет командой
+        """
+        self.follow(self.user1)
+        Post.objects.create(text='Еще пост', author=self.user1)
+        self.user1.stats.refresh_from_db()
+        self.user2.stats.refresh_from_db()
+        self.assertEqual(self.user1.stats.posts_count, 2)
+        self.assertEqual(self.user1.stats.followers_count, 1)
+        self.assertEqual(self.user2.stats.following_count, 1)
+        response = self.client3.get(
+            reverse('posts:profile', kwargs={'username': 'user1'})
+        )
+        self.assertEqual(response.context['page_obj'].paginator.count, 2)
+        ProfileStats.objects.update(posts_count=100, followers_count=0)
+        call_command('recount_stats', stdout=StringIO())
+        self.user1.stats.refresh_from_db()
+        self.assertEqual(self.user1.stats.posts_count, 2)
+        self.assertEqual(self.user1.stats.followers_count, 1)
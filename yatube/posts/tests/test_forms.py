@@ -1,3 +1,4 @@
+import io
 import shutil
 import tempfile
 
@@ -6,6 +7,7 @@ from django import forms
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase, Client, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from ..models import Post, User
 
@@ -66,6 +68,46 @@ class FormsTestClass(TestCase):
         # проверяем количество созданных постов
         self.assertEqual(Post.objects.count(), posts_count + 1)
 
+    def test_image_normalized(self):
+        """ Тест проверяет поворот, уменьшение и очистку картинки """
+        buffer = io.BytesIO()
+        exif = Image.Exif()
+        # 6 — снимок повернут, показывать с поворотом на 90°
+        exif[0x0112] = 6
+        exif[0x010F] = 'Camera'
+        Image.new('RGB', (3000, 1000), 'red').save(
+            buffer, 'JPEG', exif=exif.tobytes()
+        )
+        uploaded = SimpleUploadedFile(
+            'photo.jpeg', buffer.getvalue(), 'image/jpeg'
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            {'text': 'Снимок', 'image': uploaded},
+        )
+        post = Post.objects.get(text='Снимок')
+        self.assertEqual(post.image.name, 'posts/photo.jpg')
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (640, 1920))
+            self.assertEqual(dict(image.getexif()), {})
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_image_too_large(self):
+        """ Тест проверяет, что слишком большая картинка отклоняется """
+        buffer = io.BytesIO()
+        Image.new('RGB', (20, 20)).save(buffer, 'PNG')
+        uploaded = SimpleUploadedFile(
+            'big.png', buffer.getvalue(), 'image/png'
+        )
+        response = self.authorized_client.post(
+            reverse('posts:post_create'),
+            {'text': 'Большая картинка', 'image': uploaded},
+        )
+        self.assertTrue(response.context['form'].has_error('image'))
+        self.assertFalse(
+            Post.objects.filter(text='Большая картинка').exists()
+        )
+
     def test_edit_post_from_form(self):
         """ Тест проверяет редактирование поста """
         # редактируем пост
@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Comment, Follow, Post, ProfileStats, User
+from ..search import search_posts
+
+
+class ImportTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        rows = [
+            {'type': 'post', 'id': 100, 'text': 'Импортированный пост',
+             'author': 'author', 'group': 'imported',
+             'pub_date': '2020-01-02T03:04:05'},
+            {'type': 'comment', 'post': 100, 'text': 'Комментарий',
+             'author': 'reader', 'created': '2020-01-03T00:00:00'},
+            {'type': 'comment', 'post': 999, 'text': 'Без поста',
+             'author': 'reader'},
+            {'type': 'follow', 'user': 'reader', 'author': 'author'},
+            {'type': 'follow', 'user': 'reader', 'author': 'author'},
+            {'type': 'post', 'id': 100, 'text': 'Повтор id',
+             'author': 'author'},
+            {'type': 'post', 'text': 'Плохая дата', 'author': 'author',
+             'pub_date': '2020-13-45T00:00:00'},
+            {'type': 'comment', 'post': 'сто', 'text': 'Плохой пост',
+             'author': 'reader'},
+        ]
+        handle, self.path = tempfile.mkstemp(suffix='.jsonl')
+        with os.fdopen(handle, 'w', encoding='utf-8') as stream:
+            for row in rows:
+                stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+            stream.write('{"type": "post",\n')
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_import(self):
+        """
+        Тест проверяет загрузку постов, комментариев и подписок
+        и пересчет производных данных
+        """
+        call_command(
+            'import_data', self.path, batch_size=2,
+            stdout=StringIO(), stderr=StringIO(),
+        )
+        post = Post.objects.get(pk=100)
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(post.group.slug, 'imported')
+        self.assertEqual(Comment.objects.get().post, post)
+        self.assertEqual(Follow.objects.count(), 1)
+        reader = User.objects.get(username='reader')
+        self.assertEqual(reader.timeline.get().post, post)
+        self.assertEqual(reader.stats.following_count, 1)
+        author = User.objects.get(pk=self.author.pk)
+        self.assertEqual(author.stats.posts_count, 1)
+        self.assertEqual(search_posts('импортированный').get().post, post)
+
+    def test_bad_rows(self):
+        """
+        Тест проверяет, что битые строки пропускаются с номерами строк,
+        а остальные загружаются
+        """
+        stderr = StringIO()
+        call_command(
+            'import_data', self.path, batch_size=2,
+            stdout=StringIO(), stderr=stderr,
+        )
+        errors = stderr.getvalue()
+        for line in (3, 6, 7, 8, 9):
+            self.assertIn(f'Строка {line}:', errors)
+        self.assertEqual(Post.objects.get().text, 'Импортированный пост')
+        self.assertTrue(Post._meta.get_field('pub_date').auto_now_add)
+
+    def test_refresh_only_imported(self):
+        """
+        Тест проверяет, что статистика профилей, не затронутых
+        загрузкой, не пересчитывается
+        """
+        other = User.objects.create(username='other')
+        ProfileStats.objects.filter(user=other).update(posts_count=42)
+        call_command(
+            'import_data', self.path, batch_size=2,
+            stdout=StringIO(), stderr=StringIO(),
+        )
+        self.assertEqual(
+            ProfileStats.objects.get(user=other).posts_count, 42
+        )
@@ -1,3 +1,6 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
 from ..models import Group, Post, User
@@ -22,3 +25,9 @@ class PostModelTest(TestCase):
         """Проверяем, что у моделей корректно работает __str__."""
         self.assertEqual(self.group.title, str(self.group))
         self.assertEqual(self.post.text[:15], str(self.post))
+
+    def test_hot_queries_use_indexes(self):
+        """Проверяем по EXPLAIN, что запросы лент идут по индексам."""
+        out = StringIO()
+        call_command('explain_indexes', stdout=out)
+        self.assertNotIn('НЕ ИСПОЛЬЗУЕТСЯ', out.getvalue())
@@ -1,8 +1,14 @@
 from django.urls import reverse
+from django.core.cache import cache
 from django.test import TestCase, Client
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
+from ..counters import feed_count_key
 from ..models import User, Post, Group
+from ..paginators import KeysetPaginator
+from ..stats import recount_stats
 
 
 class PaginatorPagesTest(TestCase):
@@ -26,8 +32,13 @@ class PaginatorPagesTest(TestCase):
                 )
             )
         Post.objects.bulk_create(cls.posts)
+        # bulk_create не отправляет сигналы, поэтому счетчики профиля
+        # пересчитываем вручную
+        recount_stats(cls.user.pk)
 
     def setUp(self):
+        # а счетчики лент в кеше могут остаться от предыдущих тестов
+        cache.clear()
         # создаем гостя
         self.guest_client = Client()
 
@@ -56,3 +67,87 @@ class PaginatorPagesTest(TestCase):
                 self.assertEqual(
                     len(response.context['page_obj']),
                     settings.POSTS_ON_PAGE)
+
+    def test_cursor_pages_match_numbered_pages(self):
+        """ тест проверяет, что курсор ведет на те же страницы, что и номер """
+        address = reverse('posts:index')
+        first_page = self.guest_client.get(address).context['page_obj']
+        second_page = self.guest_client.get(
+            address, {'cursor': first_page.next_cursor}
+        ).context['page_obj']
+        numbered_page = self.guest_client.get(
+            address, {'page': 2}
+        ).context['page_obj']
+        self.assertEqual(second_page.number, 2)
+        self.assertEqual(list(second_page), list(numbered_page))
+        self.assertIsNone(second_page.next_cursor)
+        previous_page = self.guest_client.get(
+            address, {'cursor': second_page.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(previous_page.number, 1)
+        self.assertEqual(list(previous_page), list(first_page))
+        self.assertIsNone(previous_page.previous_cursor)
+
+    def test_invalid_cursor(self):
+        """ тест проверяет, что битый курсор открывает первую страницу """
+        response = self.guest_client.get(
+            reverse('posts:index'), {'cursor': 'не-курсор'}
+        )
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.number, 1)
+        self.assertEqual(len(page_obj), settings.POSTS_ON_PAGE)
+
+    def test_feed_count_cached(self):
+        """ тест проверяет, что размер ленты не считается на каждый запрос """
+        address = reverse(
+            'posts:profile', kwargs={'username': self.user.username}
+        )
+        self.guest_client.get(address)
+        Post.objects.create(text='Новый пост', author=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(address)
+        self.assertEqual(response.context['page_obj'].paginator.count, 14)
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in queries.captured_queries)
+        )
+        Post.objects.filter(text='Новый пост').get().delete()
+        response = self.guest_client.get(address)
+        self.assertEqual(response.context['page_obj'].paginator.count, 13)
+
+    def test_estimated_count(self):
+        """
+        тест проверяет, что размер ленты из кеша, отличный на единицу,
+        не сдвигает страницу: нет ни пропусков, ни повторов
+        """
+        expected = list(Post.objects.order_by('-pub_date', '-pk')[10:])
+        for count in (12, 14):
+            with self.subTest(count=count):
+                page = KeysetPaginator(
+                    Post.objects.all(), 10, count=count
+                ).page(2)
+                self.assertEqual(list(page), expected)
+                self.assertIsNone(page.next_cursor)
+        cache.set(feed_count_key('all'), 12)
+        response = self.guest_client.get(
+            reverse('posts:index'), {'page': 2}
+        )
+        self.assertEqual(list(response.context['page_obj']), expected)
+
+    def test_elided_page_range(self):
+        """ тест проверяет, что число ссылок на страницы ограничено """
+        pages = KeysetPaginator(Post.objects.all(), 1)
+        ellipsis = pages.ELLIPSIS
+        self.assertEqual(
+            pages.get_elided_page_range(7),
+            [1, ellipsis, 5, 6, 7, 8, 9, ellipsis, 13]
+        )
+        self.assertEqual(
+            pages.get_elided_page_range(1), [1, 2, 3, ellipsis, 13]
+        )
+        self.assertEqual(
+            pages.get_elided_page_range(13), [1, ellipsis, 11, 12, 13]
+        )
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(
+            response.context['page_obj'].elided_page_range, [1, 2]
+        )
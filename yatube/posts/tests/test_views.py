@@ -1,13 +1,29 @@
+import json
 import tempfile
+import threading
 import shutil
+from concurrent.futures import wait
+from io import StringIO
+from unittest import mock
 
 from django.conf import settings
+from django.core.management import call_command
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
 from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 
-from ..models import User, Post, Group
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from ..models import Comment, User, Post, Group
+from ..search import index_posts
+from ..thumbnails import (
+    CARD_THUMBNAIL, CARD_WIDTHS, POST_THUMBNAILS, submit_thumbnails,
+    thumbnail_name,
+)
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -124,12 +140,272 @@ class PostPagesTest(TestCase):
         """
         Тест сравнивает два запроса главной страницы до и после очистки кеша
         """
-        self.authorized_client.post(
-            reverse('posts:post_create'),
-            {'text': 'Новый пост'},
-            follow=True
-        )
+        self.authorized_client.get(reverse('posts:index'))
+        # меняем пост в обход сигналов — карточка остается в кеше
+        Post.objects.filter(pk=self.post.pk).update(text='Текст мимо кеша')
         bef_clear = self.authorized_client.get(reverse('posts:index')).content
         cache.clear()
         aft_clear = self.authorized_client.get(reverse('posts:index')).content
         self.assertNotEqual(bef_clear, aft_clear)
+        self.assertIn('Текст мимо кеша', aft_clear.decode())
+
+    def test_post_card_cache_invalidation(self):
+        """
+        Тест проверяет, что правка поста и имени автора сразу видны
+        в закешированной карточке
+        """
+        self.authorized_client.get(reverse('posts:index'))
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            {'text': 'Отредактированный пост', 'group': self.group.pk},
+        )
+        self.user.first_name = 'Лев'
+        self.user.last_name = 'Толстой'
+        self.user.save()
+        content = self.guest_client.get(reverse('posts:index')).content
+        self.assertIn('Отредактированный пост', content.decode())
+        self.assertIn('Лев Толстой', content.decode())
+
+    def test_guest_page_cache(self):
+        """
+        Тест проверяет, что гостю страница отдается из кеша,
+        а после записи — сразу свежая
+        """
+        cache.clear()
+        address = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+        self.assertIsNotNone(self.guest_client.get(address).context)
+        self.assertIsNone(self.guest_client.get(address).context)
+        self.assertIsNotNone(self.authorized_client.get(address).context)
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Свежий комментарий'},
+        )
+        response = self.guest_client.get(address)
+        self.assertIsNotNone(response.context)
+        self.assertIn('Свежий комментарий', response.content.decode())
+        Post.objects.create(text='Второй пост', author=self.user)
+        response = self.guest_client.get(address)
+        self.assertEqual(response.context['author_stats'].posts_count, 2)
+
+    @override_settings(THUMBNAIL_WORKERS=0)
+    def test_generate_thumbnails(self):
+        """ Тест проверяет, что команда заранее создает миниатюры """
+        source = ImageFile(self.post.image)
+        default.kvstore.delete_thumbnails(source)
+        call_command('generate_thumbnails', stdout=StringIO())
+        for geometry, options in POST_THUMBNAILS:
+            with self.subTest(geometry=geometry, options=options):
+                self.assertTrue(default.storage.exists(thumbnail_name(
+                    self.post.image.name, geometry, options
+                )))
+
+    def test_thumbnail_name(self):
+        """
+        Тест проверяет, что имя миниатюры без обращения к sorl
+        совпадает с именем, которое дает get_thumbnail
+        """
+        for geometry, options in POST_THUMBNAILS:
+            with self.subTest(geometry=geometry, options=options):
+                self.assertEqual(
+                    thumbnail_name(self.post.image.name, geometry, options),
+                    get_thumbnail(self.post.image, geometry, **options).name,
+                )
+
+    @override_settings(THUMBNAIL_WORKERS=1, THUMBNAIL_QUEUE_SIZE=1)
+    def test_thumbnail_queue_bounded(self):
+        """
+        Тест проверяет, что задачи сверх очереди пула отбрасываются,
+        а не ждут в запросе
+        """
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_generate(name, geometry, options):
+            started.set()
+            release.wait(5)
+
+        with mock.patch('posts.thumbnails.generate_thumbnail',
+                        slow_generate), \
+                mock.patch('posts.thumbnails.thumbnails_ready'):
+            with self.assertLogs('posts.thumbnails', 'WARNING') as logs:
+                futures = submit_thumbnails(
+                    self.post.image.name, self.post.pk
+                )
+            self.assertEqual(len(futures), 1)
+            self.assertEqual(len(logs.records), len(POST_THUMBNAILS) - 1)
+            started.wait(5)
+            release.set()
+            wait(futures)
+
+    @override_settings(THUMBNAIL_WORKERS=0)
+    def test_thumbnails_refresh_guest_pages(self):
+        """
+        Тест проверяет, что после создания миниатюр гость получает
+        страницы уже с ними, а не из старого кеша
+        """
+        default.kvstore.delete_thumbnails(ImageFile(self.post.image))
+        cache.clear()
+        addresses = (
+            reverse('posts:index'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for address in addresses:
+            self.assertNotContains(self.guest_client.get(address), '320w')
+            self.assertIsNone(self.guest_client.get(address).context)
+        submit_thumbnails(self.post.image.name, self.post.pk)
+        for address in addresses:
+            with self.subTest(address=address):
+                self.assertContains(self.guest_client.get(address), '320w')
+
+    @override_settings(THUMBNAIL_WORKERS=1)
+    def test_thumbnails_ready_after_pool(self):
+        """
+        Тест проверяет, что пул сбрасывает страницы картинки один раз,
+        после последней ее миниатюры
+        """
+        with mock.patch('posts.thumbnails.generate_thumbnail'), \
+                mock.patch('posts.thumbnails.thumbnails_ready') as ready:
+            wait(submit_thumbnails(self.post.image.name, self.post.pk))
+        ready.assert_called_once_with(self.post.pk)
+
+    def test_page_thumbnails(self):
+        """
+        Тест проверяет, что миниатюры карточек берутся
+        из хранилища sorl одной пачкой на страницу
+        """
+        geometry, options = CARD_THUMBNAIL
+        thumbnail = get_thumbnail(self.post.image, geometry, **options)
+        response = self.authorized_client.get(reverse('posts:index'))
+        post = response.context['page_obj'][0]
+        self.assertEqual(post.thumbnail.url, thumbnail.url)
+
+    @override_settings(THUMBNAIL_WORKERS=0)
+    def test_responsive_thumbnails(self):
+        """ Тест проверяет srcset из всех ширин и форматов миниатюры """
+        submit_thumbnails(self.post.image.name)
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        post = response.context['post']
+        self.assertEqual(post.image_variants, len(POST_THUMBNAILS))
+        for width in CARD_WIDTHS:
+            with self.subTest(width=width):
+                self.assertIn(f'{width}w', post.image_srcset)
+        self.assertContains(response, f'srcset="{post.image_srcset}"')
+        for source in post.image_sources:
+            self.assertContains(response, f'type="{source["type"]}"')
+
+    def test_comments_pagination(self):
+        """
+        Тест проверяет, что комментарии выводятся страницами,
+        а следующая страница отдается фрагментом без COUNT(*)
+        """
+        Comment.objects.bulk_create(
+            Comment(text=f'Комментарий {i}', post=self.post, author=self.user)
+            for i in range(settings.COMMENTS_ON_PAGE + 5)
+        )
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), settings.COMMENTS_ON_PAGE)
+        self.assertEqual(comments[0].text, 'Комментарий 0')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(
+                reverse(
+                    'posts:post_comments', kwargs={'post_id': self.post.pk}
+                ),
+                {'cursor': comments.next_cursor},
+            )
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in queries)
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), 5)
+        self.assertIsNone(comments.next_cursor)
+        self.assertNotContains(response, '<html')
+
+    def test_search(self):
+        """
+        Тест проверяет поиск по тексту поста и названию группы
+        и обновление индекса при изменениях
+        """
+        address = reverse('posts:search')
+        post = Post.objects.create(
+            text='Про котиков и собак', author=self.user
+        )
+        response = self.guest_client.get(address, {'q': 'котик'})
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertEqual(
+            response.context['page_obj'][0].text, 'Про котиков и собак'
+        )
+        response = self.guest_client.get(address, {'q': 'тестовая'})
+        self.assertEqual(response.context['page_obj'][0], self.post)
+        self.group.title = 'Переименованная'
+        self.group.save()
+        response = self.guest_client.get(address, {'q': 'тестовая'})
+        self.assertEqual(len(response.context['page_obj']), 0)
+        post.delete()
+        response = self.guest_client.get(address, {'q': 'котик'})
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_search_pages_equal_rank(self):
+        """
+        Тест проверяет, что курсор листает выдачу поиска дальше первой
+        страницы без пропусков и повторов при одинаковой релевантности
+        """
+        Post.objects.bulk_create(
+            Post(text='Одинаковый пост про ежей', author=self.user)
+            for _ in range(settings.POSTS_ON_PAGE * 2 + 5)
+        )
+        post_ids = list(Post.objects.filter(
+            text='Одинаковый пост про ежей'
+        ).order_by('pk').values_list('pk', flat=True))
+        index_posts(post_ids)
+        address = reverse('posts:search')
+        params = {'q': 'ежей'}
+        pages = []
+        while True:
+            page_obj = self.authorized_client.get(
+                address, params
+            ).context['page_obj']
+            pages.append([post.pk for post in page_obj])
+            if not page_obj.next_cursor:
+                break
+            params = {'q': 'ежей', 'cursor': page_obj.next_cursor}
+        self.assertEqual(len(pages), 3)
+        found = [pk for page in pages for pk in page]
+        self.assertEqual(found, post_ids)
+        page_obj = self.authorized_client.get(address, {
+            'q': 'ежей', 'cursor': page_obj.previous_cursor,
+        }).context['page_obj']
+        self.assertEqual([post.pk for post in page_obj], pages[1])
+
+    def test_profile_export(self):
+        """
+        Тест проверяет потоковую выгрузку постов и комментариев автора
+        """
+        Comment.objects.create(
+            text='Комментарий автора', post=self.post, author=self.user
+        )
+        address = reverse(
+            'posts:profile_export', kwargs={'username': self.user.username}
+        )
+        other = Client()
+        other.force_login(User.objects.create(username='other'))
+        self.assertEqual(other.get(address).status_code, 403)
+        response = self.authorized_client.get(address)
+        self.assertTrue(response.streaming)
+        rows = [
+            json.loads(line) for line in
+            b''.join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual(
+            [(row['type'], row['text']) for row in rows],
+            [('post', self.post.text), ('comment', 'Комментарий автора')],
+        )
+        response = self.authorized_client.get(address, {'format': 'csv'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
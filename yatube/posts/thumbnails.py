@@ -0,0 +1,262 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from PIL import features
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore
+
+from core.cache_versions import bump_versions
+
+from .caching import feed_page_names
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Карточка поста в нескольких ширинах с пропорциями 960x339, в WebP
+# и JPEG. Опции JPEG 960 должны совпадать с тегом {% thumbnail %}
+# в includes/post_image.html — он создает миниатюру, если ее еще нет.
+CARD_WIDTHS = (320, 640, 960)
+CARD_RATIO = 339 / 960
+# JPEG — последним: это src картинки для браузеров без <picture>.
+CARD_FORMATS = (
+    (('WEBP', 'image/webp'),) if features.check('webp') else ()
+) + (('JPEG', 'image/jpeg'),)
+POST_THUMBNAILS = tuple(
+    (
+        f'{width}x{round(width * CARD_RATIO)}',
+        {'crop': 'center', 'upscale': True, 'format': image_format},
+    )
+    for image_format, _ in CARD_FORMATS
+    for width in CARD_WIDTHS
+)
+CARD_THUMBNAIL = POST_THUMBNAILS[-1]
+
+_executor = None
+# сколько задач стоит в очереди пула или выполняется
+_queued = 0
+_queue_changed = threading.Condition()
+# сколько задач пула осталось у каждого поста
+_pending = {}
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def thumbnail_name(name, geometry, options):
+    """
+    Имя файла миниатюры — так же, как его считает
+    ``ThumbnailBackend.get_thumbnail``, но без обращения к хранилищу ключей.
+    Опирается на закрытые методы бэкенда, поэтому версия sorl закреплена
+    в requirements.txt.
+    """
+    backend = default.backend
+    source = ImageFile(name)
+    options = dict(options)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    return backend._get_thumbnail_filename(source, geometry, options)
+
+
+def load_thumbnails(names, variants=POST_THUMBNAILS):
+    """
+    Найти готовые миниатюры сразу для всех картинок и вариантов: один
+    ``get_many`` в кеше sorl и один запрос к его таблице для промахов.
+    Возвращает словарь ``{(имя картинки, вариант): ImageFile}``.
+    """
+    keys = {
+        add_prefix(ImageFile(
+            thumbnail_name(name, geometry, options), default.storage
+        ).key): (name, variant)
+        for name in set(names)
+        for variant, (geometry, options) in enumerate(variants)
+    }
+    kv_cache = getattr(default.kvstore, 'cache', None)
+    if not keys or kv_cache is None:
+        return {}
+    values = {
+        key: value for key, value in kv_cache.get_many(list(keys)).items()
+        if isinstance(value, str)
+    }
+    missing = [key for key in keys if key not in values]
+    if missing:
+        found = dict(KVStore.objects.filter(
+            key__in=missing
+        ).values_list('key', 'value'))
+        kv_cache.set_many(found, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(found)
+    return {
+        keys[key]: deserialize_image_file(value)
+        for key, value in values.items()
+    }
+
+
+def attach_thumbnails(posts):
+    """
+    Подставить постам миниатюры карточки: ``thumbnail`` (JPEG 960),
+    ``image_srcset`` для JPEG, ``image_sources`` для остальных форматов
+    и ``image_variants`` — сколько вариантов уже создано. Если миниатюры
+    еще нет, ``post.thumbnail`` пуст и шаблон создаст ее тегом.
+    """
+    thumbnails = load_thumbnails(
+        [post.image.name for post in posts if post.image]
+    )
+    card = POST_THUMBNAILS.index(CARD_THUMBNAIL)
+    for post in posts:
+        post.thumbnail = post.image and thumbnails.get((post.image.name, card))
+        post.image_srcset = ''
+        post.image_sources = []
+        post.image_variants = sum(
+            (post.image.name, variant) in thumbnails
+            for variant in range(len(POST_THUMBNAILS))
+        ) if post.image else 0
+        if not post.thumbnail:
+            continue
+        for image_format, content_type in CARD_FORMATS:
+            srcset = ', '.join(
+                f'{image.url} {image.width}w'
+                for image in (
+                    thumbnails.get((post.image.name, variant))
+                    for variant, (_, options) in enumerate(POST_THUMBNAILS)
+                    if options['format'] == image_format
+                )
+                if image
+            )
+            if image_format == CARD_THUMBNAIL[1]['format']:
+                post.image_srcset = srcset
+            elif srcset:
+                post.image_sources.append(
+                    {'type': content_type, 'srcset': srcset}
+                )
+
+
+def generate_thumbnail(name, geometry, options):
+    try:
+        get_thumbnail(name, geometry, **options)
+    except Exception:
+        logger.exception('Не удалось создать миниатюру %s для %s',
+                         geometry, name)
+
+
+def thumbnails_ready(post_id):
+    """
+    Сдвинуть версии страниц с постом: закешированные до создания
+    миниатюр страницы без srcset и WebP должны обновиться.
+    """
+    try:
+        post = Post.objects.select_related('author', 'group').filter(
+            pk=post_id
+        ).first()
+        if post is not None:
+            bump_versions([f'post:{post.pk}'] + list(feed_page_names(
+                post, [post.group.slug if post.group_id else None]
+            )))
+    except Exception:
+        logger.exception('Не удалось обновить страницы поста %s', post_id)
+
+
+def reserve_slot(block):
+    """
+    Занять место в очереди пула. Без ``block`` при полной очереди
+    возвращает False: миниатюру тогда создаст тег {% thumbnail %}.
+    """
+    global _queued
+    with _queue_changed:
+        while _queued >= settings.THUMBNAIL_QUEUE_SIZE:
+            if not block:
+                return False
+            _queue_changed.wait()
+        _queued += 1
+        return True
+
+
+def release_slot():
+    global _queued
+    with _queue_changed:
+        _queued -= 1
+        _queue_changed.notify()
+
+
+def task_done(post_id):
+    """Отметить задачу поста; True — если она была последней."""
+    if post_id is None:
+        return False
+    with _queue_changed:
+        _pending[post_id] -= 1
+        if _pending[post_id]:
+            return False
+        del _pending[post_id]
+        return True
+
+
+def generate_in_worker(name, geometry, options, post_id=None):
+    try:
+        generate_thumbnail(name, geometry, options)
+        if task_done(post_id):
+            thumbnails_ready(post_id)
+    finally:
+        # У потока пула свое соединение с базой (sorl хранит ключи в ней).
+        connections.close_all()
+        release_slot()
+
+
+def submit_thumbnails(name, post_id=None, block=False):
+    """
+    Создать все миниатюры картинки: в пуле потоков, если он включен,
+    иначе сразу. Возвращает список задач пула.
+
+    Очередь пула ограничена ``THUMBNAIL_QUEUE_SIZE``: без ``block``
+    лишние задачи отбрасываются, с ``block`` ждут свободного места.
+    С ``post_id`` после последней миниатюры страницы поста
+    сбрасываются в кеше.
+    """
+    if not settings.THUMBNAIL_WORKERS:
+        for geometry, options in POST_THUMBNAILS:
+            generate_thumbnail(name, geometry, options)
+        if post_id is not None:
+            thumbnails_ready(post_id)
+        return []
+    executor = get_executor()
+    futures = []
+    for geometry, options in POST_THUMBNAILS:
+        if not reserve_slot(block):
+            logger.warning('Очередь миниатюр заполнена, пропущена %s для %s',
+                           geometry, name)
+            continue
+        if post_id is not None:
+            with _queue_changed:
+                _pending[post_id] = _pending.get(post_id, 0) + 1
+        futures.append(executor.submit(
+            generate_in_worker, name, geometry, options, post_id
+        ))
+    return futures
+
+
+def schedule_thumbnails(post):
+    """
+    Поставить миниатюры картинки поста в очередь после коммита,
+    чтобы ни запрос, ни первый просмотр страницы не ждали их создания.
+    """
+    if not post.image:
+        return
+    name, post_id = post.image.name, post.pk
+    transaction.on_commit(lambda: submit_thumbnails(name, post_id))
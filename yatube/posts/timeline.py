@@ -0,0 +1,80 @@
+from core.cache_versions import bump_versions
+from core.utils import chunked
+
+from .caching import timeline_names
+from .models import Follow, Post, TimelineEntry
+
+BATCH_SIZE = 1000
+
+
+def fan_out_post(post):
+    """Разложить новый пост в ленты всех подписчиков автора."""
+    return fan_out_posts([post])
+
+
+def bump_timelines(user_ids):
+    """
+    Сдвинуть версии лент подписок: страница ленты зависит только
+    от версии своего подписчика, а не от лент всех его авторов.
+    """
+    bump_versions(timeline_names(user_ids))
+
+
+def fan_out_posts(posts):
+    """
+    Разложить новые посты в ленты подписчиков их авторов и сдвинуть
+    версии этих лент. Возвращает id подписчиков, чьи ленты изменились.
+    """
+    by_author = {}
+    for post in posts:
+        by_author.setdefault(post.author_id, []).append(post)
+    follows = Follow.objects.filter(
+        author_id__in=by_author
+    ).values_list('user_id', 'author_id')
+    followers = set()
+
+    def entries():
+        for user_id, author_id in follows.iterator():
+            followers.add(user_id)
+            for post in by_author[author_id]:
+                yield TimelineEntry(
+                    user_id=user_id,
+                    post_id=post.pk,
+                    author_id=author_id,
+                    pub_date=post.pub_date,
+                )
+
+    for chunk in chunked(entries(), BATCH_SIZE):
+        TimelineEntry.objects.bulk_create(chunk, ignore_conflicts=True)
+    bump_timelines(followers)
+    return followers
+
+
+def add_follow_entries(user_id, author_id):
+    """Добавить в ленту подписчика уже опубликованные посты автора."""
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('pk', 'pub_date')
+    entries = (
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for post_id, pub_date in posts.iterator()
+    )
+    for chunk in chunked(entries, BATCH_SIZE):
+        TimelineEntry.objects.bulk_create(chunk, ignore_conflicts=True)
+
+
+def remove_follow_entries(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def rebuild_timeline():
+    """Пересобрать ленты подписок целиком по таблице Follow."""
+    TimelineEntry.objects.all().delete()
+    follows = Follow.objects.values_list('user_id', 'author_id')
+    for user_id, author_id in follows.iterator():
+        add_follow_entries(user_id, author_id)
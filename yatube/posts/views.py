@@ -1,31 +1,76 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.core.exceptions import PermissionDenied
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.conf import settings
+from django.utils.http import urlencode
 
-from .forms import PostForm, CommentForm
-from .models import Group, Post, User, Follow
-
+from core.decorators import cache_anonymous_page
 
-def paginator(request, post_list):
-    pages = Paginator(post_list, settings.POSTS_ON_PAGE)
+from .caching import (
+    attach_card_versions, group_page, index_page, post_page, profile_page,
+)
+from .counters import feed_count_key
+from .export import FORMATS, export_rows
+from .forms import PostForm, CommentForm
+from .models import Comment, Group, Post, User, Follow
+from .paginators import KeysetPaginator
+from .search import search_posts
+from .stats import get_stats
+from .thumbnails import attach_thumbnails, schedule_thumbnails
+
+
+def paginator(request, post_list, count_key=None, post_attr=None, **kwargs):
+    pages = KeysetPaginator(
+        post_list,
+        settings.POSTS_ON_PAGE,
+        count_key=count_key,
+        **kwargs,
+    )
     page_number = request.GET.get('page')
-    return pages.get_page(page_number)
+    cursor = request.GET.get('cursor')
+    page_obj = pages.get_page(page_number, cursor=cursor)
+    page_obj.elided_page_range = pages.get_elided_page_range(page_obj.number)
+    if post_attr:
+        page_obj.object_list = [
+            getattr(row, post_attr) for row in page_obj.object_list
+        ]
+    attach_card_versions(page_obj.object_list)
+    attach_thumbnails(page_obj.object_list)
+    return page_obj
+
+
+def comments_page(request, post_id):
+    """
+    Страница комментариев поста по курсору от старых к новым,
+    без COUNT(*) по всем комментариям поста.
+    """
+    pages = KeysetPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        settings.COMMENTS_ON_PAGE,
+        ordering=('created', 'pk'),
+    )
+    return pages.seek_page(request.GET.get('cursor'))
 
 
+@cache_anonymous_page(index_page)
 def index(request):
     post_list = Post.objects.select_related('author', 'group')
-    page_obj = paginator(request, post_list)
+    page_obj = paginator(request, post_list, feed_count_key('all'))
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+@cache_anonymous_page(group_page)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     post_list = group.posts.select_related('author')
-    page_obj = paginator(request, post_list)
+    page_obj = paginator(
+        request, post_list, feed_count_key('group', group.pk)
+    )
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -34,35 +79,88 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@cache_anonymous_page(profile_page)
 def profile(request, username):
     author = get_object_or_404(User, username=username)
     user = request.user
+    stats = get_stats(author)
     post_list = author.posts.select_related('group')
-    page_obj = paginator(request, post_list)
+    page_obj = paginator(request, post_list, count=stats.posts_count)
     following = False
     if request.user.is_authenticated:
         following = author.following.filter(user=user.pk).exists()
     context = {
         'author': author,
+        'stats': stats,
         'page_obj': page_obj,
         'following': following,
     }
     return render(request, 'posts/profile.html', context)
 
 
+@login_required()
+def profile_export(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        raise PermissionDenied
+    data_format = request.GET.get('format')
+    if data_format not in FORMATS:
+        data_format = 'jsonl'
+    serialize, content_type = FORMATS[data_format]
+    response = StreamingHttpResponse(
+        serialize(export_rows(author)),
+        content_type=f'{content_type}; charset=utf-8',
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{author.username}.{data_format}"'
+    )
+    return response
+
+
+@cache_anonymous_page(post_page)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.select_related('author')
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id
+    )
+    attach_thumbnails([post])
     form = CommentForm()
     context = {
         'post': post,
-        'comments': comments,
+        'author_stats': get_stats(post.author),
+        'comments': comments_page(request, post.pk),
         'form': form
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@cache_anonymous_page(post_page)
+def post_comments(request, post_id):
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    context = {
+        'post_id': post_id,
+        'comments': comments_page(request, post_id),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = paginator(
+        request,
+        search_posts(query).select_related('post__author', 'post__group'),
+        post_attr='post',
+        ordering=('rank', 'post_id'),
+    )
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required()
+@transaction.atomic
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -72,6 +170,7 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        schedule_thumbnails(post)
         return redirect('posts:profile', request.user)
     return render(request, 'posts/create_post.html', {'form': form})
 
@@ -91,6 +190,8 @@ def post_edit(request, post_id):
     }
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            schedule_thumbnails(post)
         return redirect('posts:post_detail', post_id)
     return render(request, 'posts/create_post.html', context)
 
@@ -109,14 +210,22 @@ def add_comment(request, post_id):
 
 @login_required()
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user).\
-        select_related('author', 'group')
-    page_obj = paginator(request, post_list)
+    entries = request.user.timeline.select_related(
+        'post__author', 'post__group'
+    )
+    page_obj = paginator(
+        request,
+        entries,
+        feed_count_key('follow', request.user.pk),
+        ordering=('-pub_date', '-post_id'),
+        post_attr='post',
+    )
     context = {'page_obj': page_obj}
     return render(request, 'posts/follow.html', context)
 
 
 @login_required()
+@transaction.atomic
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
@@ -125,6 +234,7 @@ def profile_follow(request, username):
 
 
 @login_required()
+@transaction.atomic
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     author.following.filter(user=request.user).delete()
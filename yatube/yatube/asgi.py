@@ -0,0 +1,20 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``. Django 2.2 has no ASGI handler of its own, so
+``core.asgi.AsgiHandler`` wraps the WSGI application with asgiref's
+``WsgiToAsgi`` and runs it in a thread pool.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+wsgi_application = get_wsgi_application()
+
+from core.asgi import AsgiHandler  # noqa: E402
+
+application = AsgiHandler(wsgi_application)
@@ -30,10 +30,13 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.db_routers.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -48,7 +51,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.InstrumentedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -63,7 +66,12 @@ TEMPLATES = [
     },
 ]
 
+# компилировать все шаблоны при запуске (см. yatube/settings_prod.py)
+TEMPLATE_WARMUP = False
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# сколько потоков выполняют синхронный Django под ASGI (yatube.asgi)
+ASGI_THREADS = 16
 
 
 # Database
@@ -73,9 +81,40 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # соединение живет между запросами, а не открывается на каждый
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Реплики только для чтения: пути к копиям базы через запятую
+# в DATABASE_REPLICAS (локально их обновляет manage.py sync_replicas).
+# Чтения идут только на реплики с меткой снимка в кеше
+# (core.db_routers.mark_replica_synced после каждого обновления).
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+    filter(None, os.getenv('DATABASE_REPLICAS', '').split(',')), 1
+):
+    DATABASES[f'replica{number}'] = dict(
+        DATABASES['default'], NAME=path, TEST={'MIRROR': 'default'}
+    )
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['core.db_routers.ReplicaRouter']
+# сколько секунд после своей записи пользователь читает с основной базы
+REPLICA_STICKY_SECONDS = 10
+
+# применяются к каждому новому соединению SQLite (core.db)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'busy_timeout': 5000,
+    # в режиме WAL normal не теряет целостность при сбое питания,
+    # но не ждет fsync на каждом коммите
+    'synchronous': 'normal',
+    # размер страничного кеша в КиБ (отрицательное значение)
+    'cache_size': -20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'memory',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -128,12 +167,45 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 POSTS_ON_PAGE = 10
+COMMENTS_ON_PAGE = 20
+# сколько секунд держать в кеше размеры лент
+FEED_COUNT_TIMEOUT = 60 * 60
+# сколько секунд держать в кеше страницы для гостей
+PAGE_CACHE_TIMEOUT = 60 * 15
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# загрузки пишутся во временный файл, а не в память
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+# пределы, к которым картинки постов приводятся при загрузке
+IMAGE_MAX_PIXELS = 40_000_000
+IMAGE_MAX_SIDE = 1920
+IMAGE_QUALITY = 85
+
+# отдавать заголовок Server-Timing (только при отладке: он раскрывает
+# время запросов к базе); строки лога core.requests пишутся всегда
+SERVER_TIMING = DEBUG
+
+# сколько потоков создают миниатюры после загрузки картинки
+# (0 — создавать сразу после коммита в том же потоке)
+THUMBNAIL_WORKERS = 2
+# сколько задач миниатюр может ждать пула; лишние после загрузки
+# отбрасываются, и миниатюру создаст тег {% thumbnail %}
+THUMBNAIL_QUEUE_SIZE = 200
+
+# Кеш в файле SQLite общий для всех процессов WSGI на машине:
+# сброс версий и счетчиков виден сразу во всех воркерах.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache_backends.InstrumentedSQLiteCache',
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', os.path.join(BASE_DIR, 'cache.sqlite3')
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
     }
 }
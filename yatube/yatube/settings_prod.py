@@ -0,0 +1,71 @@
+"""
+Production settings for yatube project.
+
+Use with ``DJANGO_SETTINGS_MODULE=yatube.settings_prod``.
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, MIDDLEWARE, TEMPLATES
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', 'localhost').split(',')
+
+# Server-Timing раскрывает время запросов к базе и шаблонов: в бою
+# заголовок выключен, включается явно переменной SERVER_TIMING=1.
+SERVER_TIMING = os.getenv('SERVER_TIMING') == '1'
+
+# Метрики запросов (core.requests, уровень INFO) пишутся в stderr
+# всегда: без обработчика Python выводит только WARNING и выше.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {'format': '%(asctime)s %(levelname)s %(name)s %(message)s'},
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'stream': 'ext://sys.stderr',
+            'formatter': 'plain',
+        },
+    },
+    'loggers': {
+        'core': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'posts': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Шаблоны разбираются один раз на процесс и компилируются при запуске.
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+TEMPLATE_WARMUP = True
+
+# Статика с хешами в именах и сжатыми копиями, собирается collectstatic
+# и отдается StaticFilesMiddleware раньше остальных middleware.
+STATIC_ROOT = os.getenv('STATIC_ROOT', os.path.join(BASE_DIR, 'staticfiles'))
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+MIDDLEWARE = ['core.middleware.StaticFilesMiddleware'] + MIDDLEWARE
@@ -0,0 +1,19 @@
+"""
+Test settings for yatube project.
+
+``manage.py test`` and pytest use them instead of ``yatube.settings``,
+so tests never read or clear the shared cache file.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache_backends.InstrumentedLocMemCache',
+        'LOCATION': 'tests',
+    }
+}
+
+# Миниатюры создаются сразу после коммита: поток пула не пишет
+# во временный MEDIA_ROOT, который тест уже удаляет.
+THUMBNAIL_WORKERS = 0